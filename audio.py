@@ -0,0 +1,63 @@
+"""
+Math Hunter - Audio
+Pre-warmed voice pools for answer feedback sounds
+"""
+
+import time
+from collections import deque
+
+
+class VoicePool:
+    """Several pre-loaded copies of one sound effect, played round-robin.
+
+    A rapid second answer gets a fresh voice instead of restarting (or being
+    dropped by) the one still playing. Each voice is played once at zero
+    volume on load so the decoder is warm before the first real tap. The
+    time spent starting playback is kept for the perf HUD.
+    """
+    def __init__(self, filename, voices=3, history=100):
+        from kivy.core.audio import SoundLoader
+
+        self.filename = filename
+        self.voices = []
+        self.next_voice = 0
+        self.steals = 0  # plays that had to cut off a still-playing voice
+        self.latencies = deque(maxlen=history)  # ms spent in play()
+
+        for _ in range(voices):
+            try:
+                sound = SoundLoader.load(filename)
+            except Exception:
+                sound = None
+            if sound is None:
+                break
+            self.warm_up(sound)
+            self.voices.append(sound)
+
+    @staticmethod
+    def warm_up(sound):
+        volume = sound.volume
+        sound.volume = 0
+        sound.play()
+        sound.stop()
+        sound.volume = volume
+
+    def play(self):
+        if not self.voices:
+            return
+        start = time.perf_counter()
+
+        sound = self.voices[self.next_voice]
+        self.next_voice = (self.next_voice + 1) % len(self.voices)
+        if sound.state == 'play':
+            self.steals += 1
+            sound.stop()
+        sound.play()
+
+        self.latencies.append((time.perf_counter() - start) * 1000)
+
+    def latency(self):
+        """{'avg', 'max'} ms spent starting playback over recent plays"""
+        if not self.latencies:
+            return {"avg": 0, "max": 0}
+        return {"avg": sum(self.latencies) / len(self.latencies), "max": max(self.latencies)}
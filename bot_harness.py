@@ -0,0 +1,210 @@
+"""
+Math Hunter - Headless Bot Harness
+Drive the quiz engine with synthetic players and report per-call latency
+
+Usage:
+    python bot_harness.py --sessions 5000 --workers 4 --difficulty Hard --accuracy 0.98
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from game_engine import GameData
+from latency_stats import percentile
+
+QUESTION_COUNTS = {"Easy": 30, "Medium": 50, "Hard": 100, "Adaptive": 30}
+
+# Engine calls timed by the harness, in the order a session makes them
+CALLS = (
+    'start_quiz',
+    'restart_quiz',
+    'get_current_question',
+    'check_answer',
+    'next_question',
+    'qualifies_for_scoreboard',
+    'add_score',
+)
+
+
+class BotPlayer:
+    """Synthetic player with a fixed accuracy and mean response time"""
+    def __init__(self, accuracy, think_time, rng):
+        self.accuracy = accuracy
+        self.think_time = think_time  # mean seconds per answer (simulated)
+        self.rng = rng
+
+    def answer(self, question):
+        """Return (selected option index, simulated response time)"""
+        if self.rng.random() < self.accuracy:
+            selected = question["correct_index"]
+        else:
+            selected = self.rng.choice(
+                [i for i in range(len(question["options"])) if i != question["correct_index"]])
+        response_time = self.rng.expovariate(1 / self.think_time) if self.think_time else 0
+        return selected, response_time
+
+
+def timed(latencies, name, func, *args):
+    """Call func and append its run time (ns) to latencies[name]"""
+    start = time.perf_counter_ns()
+    result = func(*args)
+    latencies[name].append(time.perf_counter_ns() - start)
+    return result
+
+
+def play_session(game, bot, difficulty, max_restarts, latencies):
+    """Play one quiz the way QuizScreen drives GameData.
+
+    In restart_on_miss modes (Hard) a wrong answer or a timeout restarts
+    the quiz, as QuizScreen.restart_quiz does. Returns (completed, restarts).
+    """
+    num_questions = QUESTION_COUNTS[difficulty]
+    restarts = 0
+    timed(latencies, 'start_quiz', game.start_quiz, num_questions, difficulty)
+
+    while not game.is_quiz_complete():
+        question = timed(latencies, 'get_current_question', game.get_current_question)
+        selected, response_time = bot.answer(question)
+
+        if game.time_limit is not None and response_time > game.time_limit:
+            game.time_up()
+            is_correct = False
+        else:
+            is_correct = timed(latencies, 'check_answer', game.check_answer, selected)
+
+        if is_correct:
+            game.score += 1
+
+        if game.restart_on_miss and not is_correct:
+            restarts += 1
+            if restarts > max_restarts:
+                return False, restarts
+            timed(latencies, 'restart_quiz', game.restart_quiz)
+        else:
+            timed(latencies, 'next_question', game.next_question)
+
+    if timed(latencies, 'qualifies_for_scoreboard', game.qualifies_for_scoreboard, game.score):
+        timed(latencies, 'add_score', game.add_score,
+              f'bot{os.getpid()}', game.score, game.total_questions, difficulty)
+    return True, restarts
+
+
+def run_worker(args):
+    """Run a batch of sessions in one process"""
+    worker_id, sessions, options = args
+    rng = random.Random(None if options['seed'] is None else options['seed'] + worker_id)
+    random.seed(rng.random())  # GameData draws from the module-level generator
+
+    scoreboard = options['scoreboard']
+    tmp_dir = None
+    if scoreboard is None:
+        tmp_dir = tempfile.mkdtemp(prefix='mathhunter_bot_')
+        scoreboard = os.path.join(tmp_dir, 'scoreboard.json')
+
+    latencies = {name: [] for name in CALLS}
+    completed = restarts = 0
+    try:
+        game = GameData(scoreboard_file=scoreboard, sounds=False)
+        bot = BotPlayer(options['accuracy'], options['think_time'], rng)
+        for _ in range(sessions):
+            done, session_restarts = play_session(
+                game, bot, options['difficulty'], options['max_restarts'], latencies)
+            completed += done
+            restarts += session_restarts
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return completed, restarts, latencies
+
+
+def run(sessions, workers, difficulty, accuracy, think_time, max_restarts, seed=None, scoreboard=None):
+    """Run the harness and return a summary dict (latencies in microseconds)"""
+    options = {
+        'difficulty': difficulty,
+        'accuracy': accuracy,
+        'think_time': think_time,
+        'max_restarts': max_restarts,
+        'seed': seed,
+        'scoreboard': scoreboard,
+    }
+    batches = [(i, sessions // workers + (1 if i < sessions % workers else 0), options)
+               for i in range(workers)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [run_worker(batches[0])]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(run_worker, batches)
+    elapsed = time.perf_counter() - start
+
+    merged = {name: [] for name in CALLS}
+    completed = restarts = 0
+    for worker_completed, worker_restarts, latencies in results:
+        completed += worker_completed
+        restarts += worker_restarts
+        for name, samples in latencies.items():
+            merged[name].extend(samples)
+
+    calls = {}
+    for name in CALLS:
+        ordered = sorted(merged[name])
+        calls[name] = {
+            'count': len(ordered),
+            'p50': percentile(ordered, 50) / 1000,
+            'p90': percentile(ordered, 90) / 1000,
+            'p99': percentile(ordered, 99) / 1000,
+            'max': (ordered[-1] if ordered else 0) / 1000,
+        }
+
+    return {
+        'sessions': sessions,
+        'completed': completed,
+        'restarts': restarts,
+        'elapsed': elapsed,
+        'sessions_per_sec': sessions / elapsed if elapsed else 0,
+        'calls': calls,
+    }
+
+
+def print_report(summary):
+    """Print throughput and per-call latency table"""
+    print("=" * 72)
+    print(f"Sessions: {summary['sessions']}  completed: {summary['completed']}  "
+          f"restarts: {summary['restarts']}")
+    print(f"Elapsed: {summary['elapsed']:.2f}s  throughput: {summary['sessions_per_sec']:.0f} sessions/s")
+    print("=" * 72)
+    print(f"{'call':<26}{'count':>10}{'p50 us':>9}{'p90 us':>9}{'p99 us':>9}{'max us':>9}")
+    for name, stats in summary['calls'].items():
+        print(f"{name:<26}{stats['count']:>10}{stats['p50']:>9.1f}{stats['p90']:>9.1f}"
+              f"{stats['p99']:>9.1f}{stats['max']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Hunter headless bot harness")
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--difficulty', choices=sorted(QUESTION_COUNTS), default='Easy')
+    parser.add_argument('--accuracy', type=float, default=0.9, help="chance of a correct answer")
+    parser.add_argument('--think-time', type=float, default=3.0,
+                        help="mean simulated seconds per answer (Hard times out past the limit)")
+    parser.add_argument('--max-restarts', type=int, default=20,
+                        help="Hard-mode restarts before a session is abandoned")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--scoreboard', default=None,
+                        help="shared scoreboard file for contention tests (default: one per worker)")
+    args = parser.parse_args()
+
+    summary = run(args.sessions, args.workers, args.difficulty, args.accuracy,
+                  args.think_time, args.max_restarts, args.seed, args.scoreboard)
+    print_report(summary)
+
+
+if __name__ == '__main__':
+    main()
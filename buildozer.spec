@@ -15,6 +15,9 @@ source.dir = .
 # Source files to include (let empty to include all the files)
 source.include_exts = py,png,jpg,kv,atlas,ogg,wav
 
+# Desktop-only tools kept out of the APK
+source.exclude_patterns = bot_harness.py,fuzz_bench.py,grading.py,quiz_server.py,scoreboard_merge.py,sessions.py
+
 # Version of your application
 version = 1.0
 
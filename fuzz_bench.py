@@ -0,0 +1,320 @@
+"""
+Math Hunter - Differential Fuzz Benchmark
+Compare question engines against the original eval-based path
+
+Two checks, both seeded so a mismatch can be replayed:
+
+* expressions: random `a op b [op c]` expressions (negative operands,
+  zero divisors and mixed precedence included) are answered by the
+  reference (eval + the original rounding rule) and by an alternative
+  engine; the option text each produces must match exactly.
+* generate: questions drawn from each difficulty preset by the sampler
+  must carry the answer the reference computes for their expression, and
+  the sampler's throughput is compared with the original generator loop.
+
+Usage:
+    python fuzz_bench.py --count 2000000 --workers 4 --seed 1
+    python fuzz_bench.py --mode generate --count 20000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from game_engine import DIFFICULTY_PRESETS
+from operators import evaluate_expression, format_value, get_sampler
+
+# Operators the reference can evaluate ('÷' has no eval equivalent)
+FUZZ_OPERATORS = ('+', '-', '*', '//', '/', '%', '**')
+CHUNK_SIZE = 50000
+MAX_EXAMPLES = 20
+
+
+# ============================================================================
+# ENGINES
+# ============================================================================
+
+def reference_answer(expression):
+    """Correct option text as the original eval-based generator produced it"""
+    result = eval(expression)
+    if '/' in expression and '//' not in expression:
+        return f"{round(float(result), 2):.2f}"
+    return str(int(result))
+
+
+def registry_answer(expression):
+    """Correct option text from the operator registry"""
+    return format_value(*evaluate_expression(expression))
+
+
+# Alternative engines selectable with --engine; each maps an expression
+# string to the correct option text
+ENGINES = {
+    'registry': registry_answer,
+}
+
+
+def known_divergence(expression):
+    """True where the reference is itself wrong: with both '/' and '//' in an
+    expression its int() truncates the decimal answer (73 // 2 / -28 gives
+    -1, not -1.29). No preset mixes the two, so players never saw it."""
+    ops = expression.split()[1::2]
+    return '/' in ops and '//' in ops
+
+
+def answer_or_error(engine, expression):
+    try:
+        return engine(expression)
+    except (ArithmeticError, ValueError) as e:
+        return f"<{type(e).__name__}>"
+
+
+def legacy_generate_question(rng, num_min, num_max, operators, three_part):
+    """The original eval-and-retry generator, kept as the throughput baseline"""
+    while True:
+        try:
+            num1 = rng.randint(num_min, num_max)
+            num2 = rng.randint(max(1, num_min), num_max)
+            op1 = rng.choice(operators)
+
+            if rng.random() < three_part:
+                num3 = rng.randint(max(1, num_min // 2), num_max // 2)
+                op2 = rng.choice(operators)
+                question_str = f"{num1} {op1} {num2} {op2} {num3}"
+            else:
+                question_str = f"{num1} {op1} {num2}"
+
+            result = eval(question_str)
+            is_float = '/' in question_str and '//' not in question_str
+            correct = round(float(result), 2) if is_float else int(result)
+
+            if abs(correct) > 5000:
+                continue
+            if is_float and abs(correct) > 999:
+                continue
+
+            options = {correct}
+            for _ in range(5):
+                if is_float:
+                    offset = rng.uniform(-abs(correct) / 5, abs(correct) / 5)
+                    if abs(offset) < 0.1:
+                        offset = 0.1 if rng.random() > 0.5 else -0.1
+                    wrong = round(correct + offset, 2)
+                else:
+                    offset = rng.randint(-max(1, abs(correct) // 10), max(1, abs(correct) // 10))
+                    if offset == 0:
+                        offset = rng.choice([-1, 1])
+                    wrong = correct + offset
+                options.add(wrong)
+
+            options = list(options)
+            if len(options) < 4:
+                continue
+
+            options = rng.sample(options, 4)
+            if correct not in options:
+                options[rng.randint(0, 3)] = correct
+            rng.shuffle(options)
+
+            return {
+                "question": f"What is {question_str}?",
+                "options": [f"{opt:.2f}" if is_float else str(int(opt)) for opt in options],
+                "correct": correct
+            }
+        except:
+            continue
+
+
+# ============================================================================
+# EXPRESSION FUZZING
+# ============================================================================
+
+def random_expression(rng, magnitude, three_part):
+    """Random expression with negatives and zeros; '**' gets a small
+    non-negative base and exponent so its text means the same to eval"""
+    terms = 3 if rng.random() < three_part else 2
+    ops = [rng.choice(FUZZ_OPERATORS) for _ in range(terms - 1)]
+    nums = [rng.randint(-magnitude, magnitude) for _ in range(terms)]
+    for i, op in enumerate(ops):
+        if op == '**':
+            nums[i] = abs(nums[i]) % 13 if i == 0 or ops[i - 1] != '**' else nums[i] % 4
+            nums[i + 1] = rng.randint(0, 3)
+    expression = str(nums[0])
+    for op, num in zip(ops, nums[1:]):
+        expression += f" {op} {num}"
+    return expression
+
+
+def fuzz_chunk(args):
+    """Answer one seeded chunk of expressions with both engines"""
+    chunk_index, count, options = args
+    rng = random.Random(f"{options['seed']}:{chunk_index}")
+    expressions = [random_expression(rng, options['magnitude'], options['three_part'])
+                   for _ in range(count)]
+    engine = ENGINES[options['engine']]
+
+    start = time.perf_counter()
+    expected = [answer_or_error(reference_answer, e) for e in expressions]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [answer_or_error(engine, e) for e in expressions]
+    engine_time = time.perf_counter() - start
+
+    mismatches = {}
+    examples = []
+    known = 0
+    for expression, want, got in zip(expressions, expected, actual):
+        if want != got:
+            if known_divergence(expression):
+                known += 1
+                continue
+            pattern = ' '.join(['a', *expression.split()[1::2]])
+            mismatches[pattern] = mismatches.get(pattern, 0) + 1
+            if len(examples) < MAX_EXAMPLES:
+                examples.append((expression, want, got))
+    return count, reference_time, engine_time, mismatches, known, examples
+
+
+def fuzz(count, workers, engine='registry', seed=0, magnitude=120, three_part=0.5):
+    """Differentially test an engine over count expressions"""
+    options = {'engine': engine, 'seed': seed, 'magnitude': magnitude, 'three_part': three_part}
+    chunks = [(i, min(CHUNK_SIZE, count - i * CHUNK_SIZE), options)
+              for i in range((count + CHUNK_SIZE - 1) // CHUNK_SIZE)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = map(fuzz_chunk, chunks)
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap(fuzz_chunk, chunks)
+
+    total = reference_time = engine_time = known = 0
+    mismatches = {}
+    examples = []
+    for chunk_count, chunk_reference, chunk_engine, chunk_mismatches, chunk_known, chunk_examples in results:
+        total += chunk_count
+        known += chunk_known
+        reference_time += chunk_reference
+        engine_time += chunk_engine
+        for pattern, n in chunk_mismatches.items():
+            mismatches[pattern] = mismatches.get(pattern, 0) + n
+        examples.extend(chunk_examples[:MAX_EXAMPLES - len(examples)])
+    if workers != 1:
+        pool.close()
+        pool.join()
+
+    return {
+        'engine': engine,
+        'count': total,
+        'elapsed': time.perf_counter() - start,
+        'reference_per_sec': total / reference_time if reference_time else 0,
+        'engine_per_sec': total / engine_time if engine_time else 0,
+        'mismatches': mismatches,
+        'known': known,
+        'examples': examples,
+    }
+
+
+# ============================================================================
+# GENERATOR COMPARISON
+# ============================================================================
+
+def compare_generators(count, seed=0):
+    """Check sampler answers against the reference and time both generators per preset"""
+    results = {}
+    for difficulty, preset in DIFFICULTY_PRESETS.items():
+        rng = random.Random(f"{seed}:{difficulty}")
+        sampler = get_sampler(*preset)
+
+        start = time.perf_counter()
+        for _ in range(count):
+            legacy_generate_question(rng, *preset)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        questions = [sampler.sample(rng) for _ in range(count)]
+        sampler_time = time.perf_counter() - start
+
+        examples = []
+        mismatched = 0
+        for question in questions:
+            want = reference_answer(question["expression"])
+            got = question["options"][question["correct_index"]]
+            if want != got or len(set(question["options"])) != len(question["options"]):
+                mismatched += 1
+                if len(examples) < MAX_EXAMPLES:
+                    examples.append((question["expression"], want, got))
+
+        results[difficulty] = {
+            'legacy_per_sec': count / legacy_time if legacy_time else 0,
+            'sampler_per_sec': count / sampler_time if sampler_time else 0,
+            'mismatched': mismatched,
+            'examples': examples,
+        }
+    return results
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def print_fuzz_report(summary):
+    speedup = (summary['engine_per_sec'] / summary['reference_per_sec']
+               if summary['reference_per_sec'] else 0)
+    mismatched = sum(summary['mismatches'].values())
+    print("=" * 72)
+    print(f"Engine: {summary['engine']}  expressions: {summary['count']}  "
+          f"elapsed: {summary['elapsed']:.2f}s")
+    print(f"Reference: {summary['reference_per_sec']:>12,.0f} expr/s")
+    print(f"Engine:    {summary['engine_per_sec']:>12,.0f} expr/s  ({speedup:.2f}x)")
+    print(f"Mismatches: {mismatched} ({mismatched / max(1, summary['count']) * 100:.4f}%)  "
+          f"known divergences (mixed / and //): {summary['known']}")
+    print("=" * 72)
+    for pattern, n in sorted(summary['mismatches'].items(), key=lambda item: -item[1]):
+        print(f"  {pattern:<16}{n:>10}")
+    for expression, want, got in summary['examples']:
+        print(f"  {expression:<24} reference {want:<16} engine {got}")
+
+
+def print_generate_report(results, count):
+    print("=" * 72)
+    print(f"Questions per preset: {count}")
+    print("=" * 72)
+    print(f"{'difficulty':<12}{'legacy q/s':>14}{'sampler q/s':>14}{'speedup':>9}{'mismatched':>12}")
+    for difficulty, result in results.items():
+        speedup = (result['sampler_per_sec'] / result['legacy_per_sec']
+                   if result['legacy_per_sec'] else 0)
+        print(f"{difficulty:<12}{result['legacy_per_sec']:>14,.0f}{result['sampler_per_sec']:>14,.0f}"
+              f"{speedup:>8.1f}x{result['mismatched']:>12}")
+        for expression, want, got in result['examples']:
+            print(f"  {expression:<24} reference {want:<16} sampler {got}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Hunter differential fuzz benchmark")
+    parser.add_argument('--mode', choices=['expressions', 'generate'], default='expressions')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='registry')
+    parser.add_argument('--count', type=int, default=1000000,
+                        help="expressions to fuzz, or questions per preset in generate mode")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--magnitude', type=int, default=120, help="largest |operand| fuzzed")
+    parser.add_argument('--three-part', type=float, default=0.5,
+                        help="share of three-part expressions")
+    args = parser.parse_args()
+
+    if args.mode == 'generate':
+        print_generate_report(compare_generators(args.count, args.seed), args.count)
+        return
+
+    summary = fuzz(args.count, args.workers, args.engine, args.seed, args.magnitude, args.three_part)
+    print_fuzz_report(summary)
+    if summary['mismatches']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
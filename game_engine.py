@@ -0,0 +1,513 @@
+"""
+Math Hunter - Quiz Engine
+Question generation, grading and scoreboard storage (no Kivy dependency)
+"""
+
+import random
+import json
+import os
+import datetime
+import hashlib
+import struct
+import threading
+
+from operators import get_sampler, question_from_expression
+from profiles import BUILTIN_PROFILES, PROFILES_FILE, load_profiles
+from review import REVIEW_MIX_SHARE
+
+# ============================================================================
+# GLOBAL SETTINGS & DATA
+# ============================================================================
+SCOREBOARD_FILE = "scoreboard.json"
+RECENT_FILE = "recent.bin"
+
+# Feedback sounds, each loaded as a pool of SOUND_VOICES voices
+SOUND_FILES = {'correct': 'ding.ogg', 'wrong': 'buzz.ogg'}
+SOUND_VOICES = 3
+
+# (num_min, num_max, operators, three_part probability) per built-in difficulty
+DIFFICULTY_PRESETS = {name: profile.generation for name, profile in BUILTIN_PROFILES.items()}
+
+# Adaptive mode: Elo-style player rating and question difficulty buckets
+ADAPTIVE_START_RATING = 800
+ADAPTIVE_K = 48
+ADAPTIVE_BUCKET_MIN = 600
+ADAPTIVE_BUCKET_WIDTH = 100
+ADAPTIVE_BUCKET_COUNT = 10
+ADAPTIVE_POOL_PER_PRESET = 800
+ADAPTIVE_OPERATOR_WEIGHTS = {'+': 0, '-': 50, '*': 150, '//': 250, '%': 250, '**': 200,
+                             '/': 350, '÷': 350}
+
+# Duplicate avoidance: retries per question before giving up on a fresh one
+DEDUP_QUIZ_RETRIES = 20     # repeats inside one quiz
+DEDUP_RECENT_RETRIES = 3    # repeats of recently played questions
+POOL_ENUMERATE_FACTOR = 2   # list the whole question space when it is this close to a pool's size
+RECENT_BLOOM_BITS = 1 << 15
+RECENT_BLOOM_HASHES = 5
+RECENT_BLOOM_CAPACITY = 2000  # questions per filter generation
+RECENT_HEADER = struct.Struct('<II')  # current and previous filter counts, then their bits
+
+
+def question_operator(question):
+    """Operator key of a question: '*', or '+ /' for three-part questions"""
+    return ' '.join(question["expression"].split()[1::2])
+
+
+def question_fingerprint(expression):
+    """Stable 64-bit fingerprint of a question expression"""
+    return int.from_bytes(hashlib.blake2b(expression.encode(), digest_size=8).digest(), 'little')
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over question fingerprints"""
+    def __init__(self, num_bits=RECENT_BLOOM_BITS, num_hashes=RECENT_BLOOM_HASHES):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray(num_bits // 8)
+        self.count = 0
+    
+    def _positions(self, fingerprint):
+        # Double hashing from the two 32-bit halves of the fingerprint
+        h1 = fingerprint & 0xFFFFFFFF
+        h2 = (fingerprint >> 32) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+    
+    def add(self, fingerprint):
+        for pos in self._positions(fingerprint):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+    
+    def __contains__(self, fingerprint):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fingerprint))
+
+
+class RecentQuestions:
+    """Questions from a player's recent sessions, in constant memory.
+
+    Two Bloom filters rotate: once the current one holds `capacity`
+    fingerprints it becomes the previous one and a fresh filter starts, so
+    roughly the last one to two generations of questions are remembered.
+    With a path, both filters are kept on disk between launches.
+    """
+    def __init__(self, capacity=RECENT_BLOOM_CAPACITY, path=None):
+        self.capacity = capacity
+        self.path = path
+        self.current = BloomFilter()
+        self.previous = BloomFilter()
+        if path and os.path.exists(path):
+            self.load(path)
+    
+    def load(self, path):
+        """Restore both filters (a file of another filter size is ignored)"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        size = len(self.current.bits)
+        if len(data) != RECENT_HEADER.size + 2 * size:
+            return
+        self.current.count, self.previous.count = RECENT_HEADER.unpack_from(data)
+        offset = RECENT_HEADER.size
+        self.current.bits[:] = data[offset:offset + size]
+        self.previous.bits[:] = data[offset + size:]
+    
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(RECENT_HEADER.pack(self.current.count, self.previous.count))
+            f.write(self.current.bits)
+            f.write(self.previous.bits)
+        os.replace(tmp_path, path)
+    
+    def add(self, fingerprint):
+        if self.current.count >= self.capacity:
+            self.previous = self.current
+            self.current = BloomFilter()
+        self.current.add(fingerprint)
+    
+    def __contains__(self, fingerprint):
+        return fingerprint in self.current or fingerprint in self.previous
+
+
+class GameData:
+    """Global game state manager.
+
+    Headless users (bots, servers) pass sounds=False and their own
+    scoreboard_file (or None for no scoreboard) so no Kivy audio is loaded
+    and scoreboard.json is left alone. Recently played questions are kept
+    in recent_file when one is given. A seed makes question generation
+    reproducible.
+    """
+    def __init__(self, scoreboard_file=SCOREBOARD_FILE, sounds=True, avoid_recent=True,
+                 session_log=None, latency_stats=None, review_queue=None,
+                 profiles_file=PROFILES_FILE, recent_file=None, seed=None):
+        self.scoreboard_file = scoreboard_file
+        self.rng = random.Random(seed) if seed is not None else random
+        self.session_log = session_log  # optional session_log.SessionLogWriter
+        self.latency_stats = latency_stats  # optional latency_stats.LatencyStats
+        self.review_queue = review_queue  # optional review.ReviewQueue
+        self.questions = []
+        self.current_question_idx = 0
+        self.score = 0
+        self.difficulty = ""
+        self.total_questions = 0
+        self.question_start_time = 0
+        
+        # Difficulty profiles (built-in plus custom ones from profiles_file)
+        self.profiles = load_profiles(profiles_file)
+        self.time_limit = None  # seconds per question, None when untimed
+        self.restart_on_miss = False
+        self.top_scores = []
+        
+        # Adaptive mode (question index is built by prepare_adaptive or on first use)
+        self.rating = ADAPTIVE_START_RATING
+        self.adaptive = None
+        self.adaptive_lock = threading.Lock()
+        
+        # Duplicate avoidance (per quiz, plus optionally across sessions)
+        self.quiz_fingerprints = set()
+        self.recent_questions = RecentQuestions(path=recent_file) if avoid_recent else None
+        
+        # Audio
+        self.music_on = True
+        self.sound_on = True
+        self.sound_pools = {}  # sound type -> audio.VoicePool
+        
+        if sounds:
+            self.load_sounds()
+        self.load_scores()
+    
+    def load_sounds(self):
+        """Load sound effects into pre-warmed voice pools"""
+        from audio import VoicePool
+        
+        for sound_type, filename in SOUND_FILES.items():
+            pool = VoicePool(filename, SOUND_VOICES)
+            if pool.voices:
+                self.sound_pools[sound_type] = pool
+            else:
+                print(f"Warning: {filename} not found")
+    
+    def play_sound(self, sound_type):
+        """Play sound effect"""
+        if not self.sound_on:
+            return
+        
+        pool = self.sound_pools.get(sound_type)
+        if pool:
+            pool.play()
+    
+    def load_scores(self):
+        """Load top scores from file"""
+        if self.scoreboard_file and os.path.exists(self.scoreboard_file):
+            try:
+                with open(self.scoreboard_file, 'r') as f:
+                    self.top_scores = json.load(f)
+                self.top_scores.sort(key=lambda x: (x['score'], x['total']), reverse=True)
+                self.top_scores = self.top_scores[:10]
+            except:
+                self.top_scores = []
+        else:
+            self.top_scores = []
+    
+    def save_scores(self):
+        """Save top scores to file"""
+        if not self.scoreboard_file:
+            return
+        with open(self.scoreboard_file, 'w') as f:
+            json.dump(self.top_scores, f, indent=2)
+    
+    def add_score(self, name, score, total, difficulty):
+        """Add new score to scoreboard"""
+        now = datetime.datetime.now()
+        entry = {
+            "name": name,
+            "date": now.strftime("%d.%m.%Y"),
+            "time": now.strftime("%I:%M%p").lower(),
+            "difficulty": difficulty,
+            "score": score,
+            "total": total
+        }
+        self.top_scores.append(entry)
+        self.top_scores.sort(key=lambda x: (x['score'], x['total']), reverse=True)
+        self.top_scores = self.top_scores[:10]
+        self.save_scores()
+    
+    def qualifies_for_scoreboard(self, score):
+        """Check if score qualifies for top 10"""
+        return len(self.top_scores) < 10 or score > (self.top_scores[-1]['score'] if self.top_scores else -1)
+    
+    def generate_questions(self, num_questions, difficulty, reserved=()):
+        """Generate quiz questions (none repeating a reserved question)"""
+        profile = self.profiles.get(difficulty) or self.profiles["Hard"]
+        sample = profile.sampler.sample
+        
+        self.quiz_fingerprints = {question_fingerprint(q["expression"]) for q in reserved}
+        return [self.generate_unique_question(lambda: sample(self.rng))
+                for _ in range(num_questions)]
+    
+    def generate_pool(self, size, difficulty):
+        """Up to size distinct questions for a difficulty, in random order.
+
+        A question space of at most POOL_ENUMERATE_FACTOR * size is listed
+        in full and sampled (all of it when it is smaller than size);
+        larger ones are drawn from the sampler, skipping repeats, for at
+        most DEDUP_QUIZ_RETRIES draws per question.
+        """
+        profile = self.profiles.get(difficulty) or self.profiles["Hard"]
+        sampler = profile.sampler
+        if sampler.question_space() <= POOL_ENUMERATE_FACTOR * size:
+            expressions = list(sampler.expressions())
+            expressions = self.rng.sample(expressions, min(size, len(expressions)))
+            return [question_from_expression(expression, self.rng) for expression in expressions]
+        
+        fingerprints = set()
+        questions = []
+        for _ in range(size * DEDUP_QUIZ_RETRIES):
+            question = sampler.sample(self.rng)
+            fingerprint = question_fingerprint(question["expression"])
+            if fingerprint in fingerprints:
+                continue
+            fingerprints.add(fingerprint)
+            questions.append(question)
+            if len(questions) >= size:
+                break
+        return questions
+    
+    def generate_unique_question(self, make_question):
+        """Draw from make_question until the question is new to this quiz.
+
+        Recently played questions are also skipped for the first few
+        draws. When the question space is exhausted (retries run out) the
+        last draw is used anyway.
+        """
+        for attempt in range(DEDUP_QUIZ_RETRIES):
+            question = make_question()
+            fingerprint = question_fingerprint(question["expression"])
+            if fingerprint in self.quiz_fingerprints:
+                continue
+            if (self.recent_questions is not None and attempt < DEDUP_RECENT_RETRIES
+                    and fingerprint in self.recent_questions):
+                continue
+            break
+        
+        self.quiz_fingerprints.add(fingerprint)
+        if self.recent_questions is not None:
+            self.recent_questions.add(fingerprint)
+        return question
+    
+    def generate_question(self, num_min, num_max, operators, three_part):
+        """Generate a single question within the given operand/operator limits"""
+        return get_sampler(num_min, num_max, operators, three_part).sample(self.rng)
+    
+    def start_quiz(self, num_questions, difficulty, restart=False):
+        """Initialize new quiz"""
+        if self.session_log:
+            self.session_log.start(difficulty, restart=restart)
+        
+        self.set_difficulty(difficulty)
+        self.total_questions = num_questions
+        if difficulty == "Adaptive":
+            # Questions are drawn one at a time as the rating moves
+            adaptive = self.prepare_adaptive()
+            self.quiz_fingerprints = set()
+            self.questions = [self.generate_unique_question(lambda: adaptive.pick(self.rating, self.rng))]
+        else:
+            review = self.review_questions(num_questions, difficulty)
+            self.questions = self.generate_questions(num_questions - len(review), difficulty,
+                                                     reserved=review)
+            for question in review:
+                self.questions.insert(self.rng.randrange(len(self.questions) + 1), question)
+        if self.recent_questions is not None:
+            self.recent_questions.save()
+        self.current_question_idx = 0
+        self.score = 0
+        self.question_start_time = datetime.datetime.now()
+    
+    def prepare_adaptive(self):
+        """Build the Adaptive question index if needed (safe from a background thread)"""
+        with self.adaptive_lock:
+            if self.adaptive is None:
+                self.adaptive = AdaptiveEngine(self.generate_question)
+        return self.adaptive
+    
+    def review_questions(self, num_questions, difficulty):
+        """Due review questions to mix into a quiz, with fresh options"""
+        if self.review_queue is None or difficulty not in DIFFICULTY_PRESETS:
+            return []
+        due = self.review_queue.due(difficulty, int(num_questions * REVIEW_MIX_SHARE))
+        return [question_from_expression(expression, self.rng) for expression in due]
+    
+    def set_difficulty(self, difficulty):
+        """Take the quiz rules (time limit, restart on miss) from a difficulty's profile"""
+        self.difficulty = difficulty
+        profile = self.profiles.get(difficulty)
+        self.time_limit = profile.time_limit if profile else None
+        self.restart_on_miss = profile.restart_on_miss if profile else False
+    
+    def join_quiz(self, questions, difficulty):
+        """Play an existing question list (e.g. a race shared by several players)"""
+        self.set_difficulty(difficulty)
+        self.total_questions = len(questions)
+        self.questions = questions
+        self.current_question_idx = 0
+        self.score = 0
+        self.question_start_time = datetime.datetime.now()
+    
+    def restart_quiz(self):
+        """Start the same quiz over (restart_on_miss modes after a miss)"""
+        self.save_progress()
+        self.start_quiz(self.total_questions, self.difficulty, restart=True)
+    
+    def get_current_question(self):
+        """Get current question data"""
+        if self.current_question_idx < len(self.questions):
+            return self.questions[self.current_question_idx]
+        return None
+    
+    def check_answer(self, selected_index):
+        """Check if the option at selected_index is correct"""
+        question = self.get_current_question()
+        if not question:
+            return False
+        
+        is_correct = selected_index == question["correct_index"]
+        elapsed_ms = self.get_elapsed_ms()
+        if self.session_log:
+            self.session_log.answer(question, self.current_question_idx, selected_index,
+                                    is_correct, elapsed_ms)
+        if self.latency_stats:
+            self.latency_stats.record(self.difficulty, question_operator(question), elapsed_ms)
+        if self.review_queue is not None and self.difficulty in DIFFICULTY_PRESETS:
+            self.review_queue.record(question["expression"], self.difficulty, is_correct)
+        if self.difficulty == "Adaptive":
+            self.rating = self.adaptive.update_rating(self.rating, question, is_correct)
+            if len(self.questions) < self.total_questions:
+                self.questions.append(
+                    self.generate_unique_question(lambda: self.adaptive.pick(self.rating, self.rng)))
+        return is_correct
+    
+    def time_up(self):
+        """Record that the current question ran out of time"""
+        question = self.get_current_question()
+        if not question:
+            return
+        
+        elapsed_ms = self.get_elapsed_ms()
+        if self.session_log:
+            self.session_log.timeout(question, self.current_question_idx, elapsed_ms)
+        if self.latency_stats:
+            self.latency_stats.record(self.difficulty, question_operator(question), elapsed_ms)
+        if self.review_queue is not None and self.difficulty in DIFFICULTY_PRESETS:
+            self.review_queue.record(question["expression"], self.difficulty, False)
+    
+    def peek_next_question(self):
+        """Get the question after the current one without advancing"""
+        next_idx = self.current_question_idx + 1
+        if next_idx < len(self.questions):
+            return self.questions[next_idx]
+        return None
+    
+    def next_question(self):
+        """Move to next question"""
+        self.current_question_idx += 1
+        self.question_start_time = datetime.datetime.now()
+        if self.is_quiz_complete():
+            self.save_progress()
+    
+    def save_progress(self):
+        """Write the session log, latency stats and review queue (quiz end, restart, app pause)"""
+        if self.session_log:
+            self.session_log.flush()
+        if self.latency_stats:
+            self.latency_stats.save()
+        if self.review_queue is not None:
+            self.review_queue.flush()
+    
+    def question_shown(self):
+        """Restart the answer clock when the question is actually displayed"""
+        self.question_start_time = datetime.datetime.now()
+    
+    def get_elapsed_ms(self):
+        """Milliseconds since the current question was shown"""
+        return int((datetime.datetime.now() - self.question_start_time).total_seconds() * 1000)
+    
+    def get_time_remaining(self):
+        """Seconds left on a timed question (None when untimed)"""
+        if self.time_limit is None:
+            return None
+        
+        elapsed = (datetime.datetime.now() - self.question_start_time).total_seconds()
+        remaining = max(0, self.time_limit - elapsed)
+        return remaining
+    
+    def is_quiz_complete(self):
+        """Check if quiz is finished"""
+        return self.current_question_idx >= len(self.questions)
+
+
+def estimate_difficulty(expression):
+    """Estimate a question's rating from operand size, carries and operators"""
+    tokens = expression.split()
+    nums = [int(t) for t in tokens[::2]]
+    ops = tokens[1::2]
+    
+    rating = ADAPTIVE_BUCKET_MIN
+    rating += ADAPTIVE_OPERATOR_WEIGHTS.get(ops[0], 0)
+    for n in nums:
+        rating += 60 * (len(str(abs(n))) - 1)
+    
+    # Carries (addition) or borrows (subtraction) between adjacent operands
+    for a, op, b in zip(nums, ops, nums[1:]):
+        if op not in ('+', '-'):
+            continue
+        carry = 0
+        while a or b:
+            da, db = a % 10, b % 10
+            if op == '+':
+                carry = 1 if da + db + carry >= 10 else 0
+            else:
+                carry = 1 if da - db - carry < 0 else 0
+            rating += 40 * carry
+            a //= 10
+            b //= 10
+    
+    if len(ops) > 1:
+        rating += 200 + ADAPTIVE_OPERATOR_WEIGHTS.get(ops[1], 0) // 2
+    
+    return rating
+
+
+class AdaptiveEngine:
+    """Pre-generated question index bucketed by estimated difficulty.
+
+    Questions from every preset are generated once and filed under
+    ADAPTIVE_BUCKET_WIDTH-wide rating buckets. Each bucket also records the
+    nearest non-empty bucket, so pick() is a constant-time lookup.
+    """
+    def __init__(self, generate_question):
+        self.buckets = [[] for _ in range(ADAPTIVE_BUCKET_COUNT)]
+        
+        for preset in DIFFICULTY_PRESETS.values():
+            for _ in range(ADAPTIVE_POOL_PER_PRESET):
+                question = generate_question(*preset)
+                question["rating"] = estimate_difficulty(question["expression"])
+                self.buckets[self.bucket_for(question["rating"])].append(question)
+        
+        filled = [i for i, bucket in enumerate(self.buckets) if bucket]
+        self.nearest = [min(filled, key=lambda f: abs(f - i)) for i in range(ADAPTIVE_BUCKET_COUNT)]
+    
+    def bucket_for(self, rating):
+        """Bucket index for a rating, clamped to the index range"""
+        index = int(rating - ADAPTIVE_BUCKET_MIN) // ADAPTIVE_BUCKET_WIDTH
+        return max(0, min(ADAPTIVE_BUCKET_COUNT - 1, index))
+    
+    def pick(self, rating, rng=random):
+        """Draw a question matching the player's rating"""
+        return rng.choice(self.buckets[self.nearest[self.bucket_for(rating)]])
+    
+    def update_rating(self, rating, question, is_correct):
+        """Elo update of the player rating against the question's rating"""
+        expected = 1 / (1 + 10 ** ((question["rating"] - rating) / 400))
+        return rating + ADAPTIVE_K * ((1 if is_correct else 0) - expected)
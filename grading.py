@@ -0,0 +1,184 @@
+"""
+Math Hunter - Bulk Worksheet Grading
+Grade whole answer sheets against an answer key in one pass
+
+A question id is the question's expression ('12 * 7') or its 64-bit
+fingerprint (game_engine.question_fingerprint), so exported worksheets can
+carry either. Submitted values are numbers or text ('3', '2.50', '7/3');
+blanks and unreadable entries count as unanswered.
+
+A value is correct when it is within operators.ANSWER_TOLERANCE (0.001)
+of the answer, the rule the quiz graded option text by, for whole-number,
+decimal and fraction questions alike.
+
+Usage:
+    python grading.py sheets.json
+where sheets.json is {"key": [expression, ...],
+                      "sheets": [{"question_ids": [...], "answers": [...]}, ...]}
+"""
+
+import json
+import sys
+from array import array
+from collections import Counter
+from fractions import Fraction
+from itertools import compress
+
+from game_engine import question_fingerprint, question_operator
+from operators import ANSWER_TOLERANCE, evaluate_expression
+
+NAN = float('nan')
+
+
+def parse_answer(value):
+    """Submitted value as a float (NaN when blank or unreadable)"""
+    if value is None:
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    except OverflowError:
+        return NAN
+    try:
+        return float(Fraction(str(value).strip()))
+    except (ValueError, ZeroDivisionError, OverflowError):
+        return NAN
+
+
+def parse_answers(values):
+    """Submitted values as an array of floats, converted in one C-level pass when possible"""
+    try:
+        return array('d', values)
+    except (TypeError, OverflowError):
+        return array('d', map(parse_answer, values))
+
+
+class AnswerKey:
+    """Columnar answer key: correct value and operator per question"""
+    def __init__(self):
+        self.rows = {}  # expression and fingerprint -> row
+        self.expressions = []
+        self.corrects = array('d')
+        self.operator_rows = array('H')
+        self.operators = []  # operator key per operator_rows code
+
+    def __len__(self):
+        return len(self.expressions)
+
+    def add(self, expression, correct=None):
+        """Add a question (answer computed from the expression if not given); returns its row"""
+        row = self.rows.get(expression)
+        if row is not None:
+            return row
+        if correct is None:
+            correct, _result_type = evaluate_expression(expression)
+
+        row = len(self.expressions)
+        self.rows[expression] = row
+        self.rows[question_fingerprint(expression)] = row
+        self.expressions.append(expression)
+        self.corrects.append(float(correct))
+
+        operator = question_operator({"expression": expression})
+        if operator not in self.operators:
+            self.operators.append(operator)
+        self.operator_rows.append(self.operators.index(operator))
+        return row
+
+    @classmethod
+    def from_questions(cls, questions):
+        """Key for quiz question dicts (answers recomputed from their expressions)"""
+        key = cls()
+        for question in questions:
+            key.add(question["expression"])
+        return key
+
+    def grade(self, question_ids, submitted):
+        """Grade one sheet; returns (rows, answered flags, correct flags), row -1 for unknown ids"""
+        get = self.rows.get
+        rows = [get(question_id, -1) for question_id in question_ids]
+        values = parse_answers(submitted)
+        corrects = self.corrects
+
+        answered = [value == value for value in values]  # NaN != NaN
+        correct = [row >= 0 and abs(value - corrects[row]) < ANSWER_TOLERANCE
+                   for row, value in zip(rows, values)]
+        return rows, answered, correct
+
+    def grade_sheet(self, question_ids, submitted):
+        """Score and per-operator summary for one sheet"""
+        return self.grade_sheets([(question_ids, submitted)])["sheets"][0]
+
+    def grade_sheets(self, sheets):
+        """Grade many (question_ids, submitted) sheets.
+
+        Returns {"sheets": [per-sheet summary], "operators": {operator:
+        {"questions", "answered", "correct", "accuracy"}}} where the
+        operator summary covers every sheet.
+        """
+        operator_rows = self.operator_rows
+        questions = Counter()
+        answered_by_operator = Counter()
+        correct_by_operator = Counter()
+        results = []
+
+        for question_ids, submitted in sheets:
+            if len(question_ids) != len(submitted):
+                raise ValueError("question_ids and submitted answers differ in length")
+            rows, answered, correct = self.grade(question_ids, submitted)
+
+            known = [row for row in rows if row >= 0]
+            questions.update(operator_rows[row] for row in known)
+            answered_by_operator.update(operator_rows[row] for row in compress(rows, answered) if row >= 0)
+            correct_by_operator.update(operator_rows[row] for row in compress(rows, correct))
+
+            total = len(rows)
+            score = sum(correct)
+            results.append({
+                "total": total,
+                "answered": sum(answered),
+                "correct": score,
+                "unknown": total - len(known),
+                "percentage": score / total * 100 if total else 0,
+                "results": correct,
+            })
+
+        operators = {}
+        for code, count in sorted(questions.items()):
+            answered = answered_by_operator[code]
+            correct = correct_by_operator[code]
+            operators[self.operators[code]] = {
+                "questions": count,
+                "answered": answered,
+                "correct": correct,
+                "accuracy": correct / answered * 100 if answered else 0,
+            }
+        return {"sheets": results, "operators": operators}
+
+
+def grade_file(path):
+    with open(path, 'r') as f:
+        data = json.load(f)
+    key = AnswerKey()
+    for expression in data["key"]:
+        key.add(expression)
+    return key.grade_sheets((sheet["question_ids"], sheet["answers"]) for sheet in data["sheets"])
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+    summary = grade_file(sys.argv[1])
+    sheets = summary["sheets"]
+    average = sum(s["percentage"] for s in sheets) / len(sheets) if sheets else 0
+    print(f"Sheets: {len(sheets)}  average score: {average:.1f}%")
+    print(f"{'operator':<10}{'questions':>11}{'answered':>10}{'correct':>10}{'accuracy':>10}")
+    for operator, entry in summary["operators"].items():
+        print(f"{operator:<10}{entry['questions']:>11}{entry['answered']:>10}"
+              f"{entry['correct']:>10}{entry['accuracy']:>9.1f}%")
+
+
+if __name__ == '__main__':
+    main()
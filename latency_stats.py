@@ -0,0 +1,166 @@
+"""
+Math Hunter - Response Latency Histograms
+Fixed-memory, log-bucketed answer latency per operator and difficulty
+
+Histograms from several devices can be merged:
+    python latency_stats.py device1.json device2.json ...
+"""
+
+import json
+import math
+import os
+import sys
+
+LATENCY_FILE = "latency.json"
+
+# Buckets: 0 holds < 1 ms, then SUB_BUCKETS per power of two up to 2**MAX_POWER ms
+SUB_BUCKETS = 8          # ~9% relative resolution
+MAX_POWER = 17           # ~131 s, far past any time limit
+NUM_BUCKETS = 1 + SUB_BUCKETS * MAX_POWER
+
+
+def bucket_for(ms):
+    """Bucket index for a latency in milliseconds"""
+    if ms < 1:
+        return 0
+    return min(NUM_BUCKETS - 1, 1 + int(math.log2(ms) * SUB_BUCKETS))
+
+
+def bucket_value(index):
+    """Representative latency (geometric bucket midpoint) in milliseconds"""
+    if index == 0:
+        return 0.5
+    return 2 ** ((index - 1 + 0.5) / SUB_BUCKETS)
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list (0 if empty)"""
+    if not ordered:
+        return 0
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram of constant size"""
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.total = 0
+
+    def record(self, ms):
+        self.counts[bucket_for(ms)] += 1
+        self.total += 1
+
+    def merge(self, other):
+        """Add another histogram's counts into this one"""
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        return self
+
+    def quantile(self, q):
+        """Approximate latency (ms) at quantile q in [0, 1]"""
+        if not self.total:
+            return 0
+        target = max(1, math.ceil(q * self.total))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return bucket_value(i)
+        return bucket_value(NUM_BUCKETS - 1)
+
+    def percentiles(self):
+        return {
+            "count": self.total,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p99": self.quantile(0.99),
+        }
+
+    def to_dict(self):
+        """Sparse {bucket: count} form for JSON"""
+        return {str(i): count for i, count in enumerate(self.counts) if count}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        for i, count in data.items():
+            histogram.counts[int(i)] += count
+            histogram.total += count
+        return histogram
+
+
+class LatencyStats:
+    """Histograms keyed by (difficulty, operator), optionally backed by a file"""
+    def __init__(self, path=None):
+        self.path = path
+        self.histograms = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.merge_dict(json.load(f))
+            except:
+                self.histograms = {}
+
+    def record(self, difficulty, operator, ms):
+        key = (difficulty, operator)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(ms)
+
+    def get(self, difficulty=None, operator=None):
+        """Merged histogram over all keys matching the given filters"""
+        merged = LatencyHistogram()
+        for (key_difficulty, key_operator), histogram in self.histograms.items():
+            if difficulty is not None and key_difficulty != difficulty:
+                continue
+            if operator is not None and key_operator != operator:
+                continue
+            merged.merge(histogram)
+        return merged
+
+    def percentiles(self, difficulty=None, operator=None):
+        """p50/p90/p99 in ms for the matching histograms"""
+        return self.get(difficulty, operator).percentiles()
+
+    def merge(self, other):
+        """Add another LatencyStats (e.g. from another device) into this one"""
+        for key, histogram in other.histograms.items():
+            self.histograms.setdefault(key, LatencyHistogram()).merge(histogram)
+        return self
+
+    def to_dict(self):
+        return {f"{difficulty}|{operator}": histogram.to_dict()
+                for (difficulty, operator), histogram in self.histograms.items()}
+
+    def merge_dict(self, data):
+        for key, counts in data.items():
+            difficulty, operator = key.split('|', 1)
+            self.histograms.setdefault((difficulty, operator), LatencyHistogram()).merge(
+                LatencyHistogram.from_dict(counts))
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+
+def main():
+    paths = sys.argv[1:] or [LATENCY_FILE]
+    stats = LatencyStats()
+    for path in paths:
+        stats.merge(LatencyStats(path))
+
+    print(f"{'difficulty':<12}{'operator':<10}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for difficulty, operator in sorted(stats.histograms):
+        p = stats.percentiles(difficulty, operator)
+        print(f"{difficulty:<12}{operator:<10}{p['count']:>8}"
+              f"{p['p50']:>10.0f}{p['p90']:>10.0f}{p['p99']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@ Modern Math Quiz Game for Mobile
 """
 
 from kivy.app import App
-from kivy.uix.screenmanager import ScreenManager, Screen, FadeTransition
+from kivy.uix.screenmanager import ScreenManager, Screen, FadeTransition, SlideTransition, NoTransition
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.button import Button
@@ -14,279 +14,449 @@ from kivy.uix.scrollview import ScrollView
 from kivy.uix.popup import Popup
 from kivy.clock import Clock
 from kivy.core.window import Window
-from kivy.core.audio import SoundLoader
+from kivy.core.text import Label as CoreLabel
 from kivy.graphics import Color, RoundedRectangle, Line
 from kivy.metrics import dp
 
-import random
+import datetime
 import json
 import os
-import datetime
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from game_engine import GameData, RECENT_FILE
+from session_log import SessionLogWriter, SESSION_LOG_FILE
+from latency_stats import LatencyStats, LATENCY_FILE, percentile
+from review import ReviewQueue, REVIEW_FILE
 
 # ============================================================================
 # GLOBAL SETTINGS & DATA
 # ============================================================================
-SCOREBOARD_FILE = "scoreboard.json"
+PERF_LOG_FILE = "perf_log.json"
+MEMORY_REPORT_FILE = "memory_report.txt"
 
-class GameData:
-    """Global game state manager"""
-    def __init__(self):
-        self.questions = []
-        self.current_question_idx = 0
-        self.score = 0
-        self.difficulty = ""
-        self.total_questions = 0
-        self.question_start_time = 0
-        self.time_limit = 15  # seconds for Hard mode
-        self.top_scores = []
-        
-        # Audio
-        self.music_on = True
-        self.sound_on = True
-        self.sound_correct = None
-        self.sound_wrong = None
-        
-        self.load_sounds()
-        self.load_scores()
+# Global game data instance
+game_data = GameData(session_log=SessionLogWriter(SESSION_LOG_FILE),
+                     latency_stats=LatencyStats(LATENCY_FILE),
+                     review_queue=ReviewQueue(REVIEW_FILE),
+                     recent_file=RECENT_FILE)
+
+
+# ============================================================================
+# PERFORMANCE HUD
+# ============================================================================
+
+class PerfMonitor:
+    """Frame-time and jank overlay, toggled from SettingsScreen.
+
+    Keeps a rolling history of frame times, per-frame texture uploads
+    (CoreLabel renders, which is every label/button re-texture in this app,
+    the HUD's own included) and the run time of Clock callbacks wrapped
+    with timed().
+    """
+    def __init__(self, history=600):
+        self.enabled = False
+        self.history = history
+        self.frame_times = deque(maxlen=history)
+        self.uploads = deque(maxlen=history)
+        self.callback_times = {}
+        self.hud = None
+        
+        self._frame_uploads = 0
+        self._frame_event = None
+        self._hud_event = None
+        self._orig_refresh = None
     
-    def load_sounds(self):
-        """Load sound effects"""
-        try:
-            self.sound_correct = SoundLoader.load('ding.ogg')
-        except:
-            print("Warning: ding.ogg not found")
-        
-        try:
-            self.sound_wrong = SoundLoader.load('buzz.ogg')
-        except:
-            print("Warning: buzz.ogg not found")
-    
-    def play_sound(self, sound_type):
-        """Play sound effect"""
-        if not self.sound_on:
+    def enable(self):
+        """Start sampling and show the overlay"""
+        if self.enabled:
             return
+        self.enabled = True
+        
+        # Count texture uploads by wrapping the core label renderer
+        monitor = self
+        orig_refresh = self._orig_refresh = CoreLabel.refresh
+        
+        def refresh(label, *args, **kwargs):
+            monitor._frame_uploads += 1
+            return orig_refresh(label, *args, **kwargs)
+        CoreLabel.refresh = refresh
+        
+        self.hud = Label(
+            text='',
+            font_size=dp(11),
+            size_hint=(None, None),
+            halign='left',
+            valign='top',
+            color=(1, 1, 0.4, 1)
+        )
+        self.hud.bind(texture_size=self._place_hud)
+        Window.bind(size=self._place_hud)
+        Window.add_widget(self.hud)
         
-        if sound_type == 'correct' and self.sound_correct:
-            self.sound_correct.play()
-        elif sound_type == 'wrong' and self.sound_wrong:
-            self.sound_wrong.play()
+        self._frame_event = Clock.schedule_interval(self._on_frame, 0)
+        self._hud_event = Clock.schedule_interval(self._refresh_hud, 0.5)
     
-    def load_scores(self):
-        """Load top scores from file"""
-        if os.path.exists(SCOREBOARD_FILE):
-            try:
-                with open(SCOREBOARD_FILE, 'r') as f:
-                    self.top_scores = json.load(f)
-                self.top_scores.sort(key=lambda x: (x['score'], x['total']), reverse=True)
-                self.top_scores = self.top_scores[:10]
-            except:
-                self.top_scores = []
+    def disable(self):
+        """Stop sampling and remove the overlay"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        
+        self._frame_event.cancel()
+        self._hud_event.cancel()
+        CoreLabel.refresh = self._orig_refresh
+        Window.unbind(size=self._place_hud)
+        Window.remove_widget(self.hud)
+        self.hud = None
+    
+    def toggle(self):
+        if self.enabled:
+            self.disable()
         else:
-            self.top_scores = []
-    
-    def save_scores(self):
-        """Save top scores to file"""
-        with open(SCOREBOARD_FILE, 'w') as f:
-            json.dump(self.top_scores, f, indent=2)
-    
-    def add_score(self, name, score, total, difficulty):
-        """Add new score to scoreboard"""
-        now = datetime.datetime.now()
-        entry = {
-            "name": name,
-            "date": now.strftime("%d.%m.%Y"),
-            "time": now.strftime("%I:%M%p").lower(),
-            "difficulty": difficulty,
-            "score": score,
-            "total": total
+            self.enable()
+        return self.enabled
+    
+    def timed(self, name, callback):
+        """Wrap a Clock callback so its run time is recorded under `name`"""
+        def wrapper(*args):
+            if not self.enabled:
+                return callback(*args)
+            start = time.perf_counter()
+            try:
+                return callback(*args)
+            finally:
+                samples = self.callback_times.get(name)
+                if samples is None:
+                    samples = self.callback_times[name] = deque(maxlen=self.history)
+                samples.append((time.perf_counter() - start) * 1000)
+        return wrapper
+    
+    def _on_frame(self, dt):
+        self.frame_times.append(dt * 1000)
+        self.uploads.append(self._frame_uploads)
+        self._frame_uploads = 0
+    
+    def _place_hud(self, *args):
+        self.hud.size = self.hud.texture_size
+        self.hud.pos = (dp(5), Window.height - self.hud.height - dp(5))
+    
+    def summary(self):
+        """Current stats as a dict (times in ms)"""
+        frames = sorted(self.frame_times)
+        mean = sum(frames) / len(frames) if frames else 0
+        uploads = list(self.uploads)
+        return {
+            "fps": 1000 / mean if mean else 0,
+            "p95": percentile(frames, 95),
+            "p99": percentile(frames, 99),
+            "uploads_avg": sum(uploads) / len(uploads) if uploads else 0,
+            "uploads_max": max(uploads) if uploads else 0,
+            "callbacks": {
+                name: {"avg": sum(t) / len(t), "max": max(t)}
+                for name, t in self.callback_times.items() if t
+            },
+            "audio": {
+                name: pool.latency() for name, pool in game_data.sound_pools.items()
+            },
+            "transitions": transition_engine.summary()
         }
-        self.top_scores.append(entry)
-        self.top_scores.sort(key=lambda x: (x['score'], x['total']), reverse=True)
-        self.top_scores = self.top_scores[:10]
-        self.save_scores()
-    
-    def qualifies_for_scoreboard(self, score):
-        """Check if score qualifies for top 10"""
-        return len(self.top_scores) < 10 or score > (self.top_scores[-1]['score'] if self.top_scores else -1)
-    
-    def generate_questions(self, num_questions, difficulty):
-        """Generate quiz questions"""
-        questions = []
-        
-        if difficulty == "Easy":
-            num_min, num_max = 1, 12
-            operators = ['+', '-', '*']
-            three_part = 0
-        elif difficulty == "Medium":
-            num_min, num_max = 10, 50
-            operators = ['+', '-', '*', '//']
-            three_part = 0
-        else:  # Hard
-            num_min, num_max = 20, 100
-            operators = ['+', '-', '*', '/']
-            three_part = 0.4
-        
-        for _ in range(num_questions):
-            while True:
-                try:
-                    num1 = random.randint(num_min, num_max)
-                    num2 = random.randint(max(1, num_min), num_max)
-                    op1 = random.choice(operators)
-                    
-                    if difficulty == "Hard" and random.random() < three_part:
-                        num3 = random.randint(max(1, num_min // 2), num_max // 2)
-                        op2 = random.choice(operators)
-                        question_str = f"{num1} {op1} {num2} {op2} {num3}"
-                    else:
-                        question_str = f"{num1} {op1} {num2}"
-                    
-                    result = eval(question_str)
-                    is_float = '/' in question_str and '//' not in question_str
-                    
-                    if is_float:
-                        correct = round(float(result), 2)
-                    else:
-                        correct = int(result)
-                    
-                    if abs(correct) > 5000:
-                        continue
-                    if is_float and abs(correct) > 999:
-                        continue
-                    
-                    # Generate options
-                    options = {correct}
-                    for _ in range(5):
-                        if is_float:
-                            offset = random.uniform(-abs(correct)/5, abs(correct)/5)
-                            if abs(offset) < 0.1:
-                                offset = 0.1 if random.random() > 0.5 else -0.1
-                            wrong = round(correct + offset, 2)
-                        else:
-                            offset = random.randint(-max(1, abs(correct)//10), 
-                                                   max(1, abs(correct)//10))
-                            if offset == 0:
-                                offset = random.choice([-1, 1])
-                            wrong = correct + offset
-                        options.add(wrong)
-                    
-                    options = list(options)
-                    if len(options) < 4:
-                        continue
-                    
-                    options = random.sample(options, 4)
-                    if correct not in options:
-                        options[random.randint(0, 3)] = correct
-                    random.shuffle(options)
-                    
-                    formatted = []
-                    for opt in options:
-                        if is_float:
-                            formatted.append(f"{opt:.2f}")
-                        else:
-                            formatted.append(str(int(opt)))
-                    
-                    questions.append({
-                        "question": f"What is {question_str}?",
-                        "options": formatted,
-                        "correct": correct
-                    })
+    
+    def _refresh_hud(self, dt):
+        stats = self.summary()
+        lines = [
+            f'FPS {stats["fps"]:.1f}  p95 {stats["p95"]:.1f}ms  p99 {stats["p99"]:.1f}ms',
+            f'tex/frame {stats["uploads_avg"]:.2f} (max {stats["uploads_max"]})'
+        ]
+        for name, t in sorted(stats["callbacks"].items()):
+            lines.append(f'{name} {t["avg"]:.2f}ms (max {t["max"]:.2f})')
+        for name, t in sorted(stats["audio"].items()):
+            lines.append(f'sound {name} {t["avg"]:.2f}ms (max {t["max"]:.2f})')
+        last = stats["transitions"]["last"]
+        if last:
+            lines.append(f'{last["from"]}->{last["to"]} {last["transition"]} {last["duration_ms"]:.0f}ms '
+                         f'frame avg {last["avg_frame_ms"]:.1f} max {last["max_frame_ms"]:.1f}')
+        self.hud.text = '\n'.join(lines)
+    
+    def dump(self, path=PERF_LOG_FILE):
+        """Write the rolling history to a JSON file"""
+        data = {
+            "summary": self.summary(),
+            "frame_times_ms": list(self.frame_times),
+            "uploads_per_frame": list(self.uploads),
+            "callback_times_ms": {name: list(t) for name, t in self.callback_times.items()},
+            "transitions": list(transition_engine.records)
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+# Global performance monitor instance
+perf_monitor = PerfMonitor()
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots on every screen change.
+
+    For each visit it reports traced memory, the top allocation sites and
+    the growth since the previous visit to the same screen, appending to
+    MEMORY_REPORT_FILE. Set MATHHUNTER_TRACEMALLOC=1 to trace from startup
+    (so the eagerly built screens are included), or toggle it in Settings.
+    """
+    TRACE_FRAMES = 5
+    TOP_N = 10
+    
+    def __init__(self):
+        self.enabled = False
+        self.snapshots = {}  # screen name -> last snapshot
+        self.visits = {}
+        if os.environ.get('MATHHUNTER_TRACEMALLOC'):
+            self.enable()
+    
+    def enable(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.TRACE_FRAMES)
+        self.enabled = True
+    
+    def disable(self):
+        self.enabled = False
+        self.snapshots.clear()
+        tracemalloc.stop()
+    
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+    
+    def on_screen(self, manager, screen_name):
+        """ScreenManager.current handler; snapshot once the new screen is built"""
+        if self.enabled:
+            Clock.schedule_once(lambda dt: self.snapshot(screen_name), 0)
+    
+    def snapshot(self, screen_name):
+        """Take a snapshot for screen_name and append its report"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+        visit = self.visits[screen_name] = self.visits.get(screen_name, 0) + 1
+        current, peak = tracemalloc.get_traced_memory()
+        
+        lines = [
+            f'=== {datetime.datetime.now():%Y-%m-%d %H:%M:%S}  {screen_name} (visit {visit})',
+            f'traced {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB',
+            'top allocation sites:'
+        ]
+        for stat in snapshot.statistics('lineno')[:self.TOP_N]:
+            lines.append(f'  {stat.size / 1024:8.1f} KiB {stat.count:7d} blocks  {stat.traceback}')
+        
+        previous = self.snapshots.get(screen_name)
+        if previous is not None:
+            lines.append('growth since last visit:')
+            for stat in snapshot.compare_to(previous, 'lineno')[:self.TOP_N]:
+                if stat.size_diff <= 0:
                     break
-                except:
-                    continue
-        
-        return questions
+                lines.append(f'  {stat.size_diff / 1024:+8.1f} KiB {stat.count_diff:+7d} blocks'
+                             f'  {stat.traceback}')
+        self.snapshots[screen_name] = snapshot
+        
+        report = '\n'.join(lines) + '\n'
+        with open(MEMORY_REPORT_FILE, 'a') as f:
+            f.write(report)
+        return report
+
+
+# Global memory profiler instance
+memory_profiler = MemoryProfiler()
+
+
+class TransitionEngine:
+    """Chooses the ScreenManager transition and measures each screen change.
+
+    Modes are 'auto', 'fade', 'slide' and 'none'. Auto fades until the
+    average frame time inside recent animated transitions goes over
+    FRAME_BUDGET_MS, then switches to no transition (low power) for the
+    rest of the run. Every change is timed from the `current` update to
+    the transition's on_complete, with its frame times; MATHHUNTER_TRANSITIONS
+    sets the starting mode.
+    """
+    MODES = ('auto', 'fade', 'slide', 'none')
+    DURATION = 0.4  # Kivy default
+    FRAME_BUDGET_MS = 25
+    AUTO_SAMPLES = 3
     
-    def start_quiz(self, num_questions, difficulty):
-        """Initialize new quiz"""
-        self.difficulty = difficulty
-        self.total_questions = num_questions
-        self.questions = self.generate_questions(num_questions, difficulty)
-        self.current_question_idx = 0
-        self.score = 0
-        self.question_start_time = datetime.datetime.now()
-    
-    def get_current_question(self):
-        """Get current question data"""
-        if self.current_question_idx < len(self.questions):
-            return self.questions[self.current_question_idx]
-        return None
-    
-    def check_answer(self, selected_text):
-        """Check if answer is correct"""
-        question = self.get_current_question()
-        if not question:
-            return False
-        
-        try:
-            if isinstance(question["correct"], float):
-                selected = float(selected_text)
-                is_correct = abs(selected - question["correct"]) < 0.001
-            else:
-                selected = int(selected_text)
-                is_correct = selected == question["correct"]
-            return is_correct
-        except:
-            return False
+    def __init__(self, history=100):
+        mode = os.environ.get('MATHHUNTER_TRANSITIONS', 'auto')
+        self.mode = mode if mode in self.MODES else 'auto'
+        self.low_power = False
+        self.records = deque(maxlen=history)
+        self.manager = None
+        self.screen = ''
+        
+        self._measuring = None  # record being filled for the running transition
+        self._frames = []
+        self._frame_event = None
     
-    def next_question(self):
-        """Move to next question"""
-        self.current_question_idx += 1
-        self.question_start_time = datetime.datetime.now()
+    def attach(self, manager):
+        """Take over a ScreenManager's transitions (after its screens are added)"""
+        self.manager = manager
+        self.screen = manager.current
+        manager.bind(current=self._on_current)
+        self.apply()
     
-    def get_time_remaining(self):
-        """Get remaining time for Hard mode"""
-        if self.difficulty != "Hard":
-            return None
-        
-        elapsed = (datetime.datetime.now() - self.question_start_time).total_seconds()
-        remaining = max(0, self.time_limit - elapsed)
-        return remaining
+    @property
+    def transition_name(self):
+        if self.mode == 'auto':
+            return 'none' if self.low_power else 'fade'
+        return self.mode
+    
+    def apply(self):
+        name = self.transition_name
+        if name == 'fade':
+            transition = FadeTransition(duration=self.DURATION)
+        elif name == 'slide':
+            transition = SlideTransition(duration=self.DURATION)
+        else:
+            transition = NoTransition()
+        transition.bind(on_complete=self._on_complete)
+        self.manager.transition = transition
+    
+    def set_mode(self, mode):
+        self.mode = mode
+        self.low_power = False
+        self.apply()
+    
+    def cycle(self):
+        """Switch to the next mode; returns it"""
+        self.set_mode(self.MODES[(self.MODES.index(self.mode) + 1) % len(self.MODES)])
+        return self.mode
+    
+    def _on_current(self, manager, screen_name):
+        if self._measuring is not None:
+            self._finish()
+        self._measuring = {
+            "from": self.screen,
+            "to": screen_name,
+            "transition": self.transition_name,
+            "start": time.perf_counter(),
+        }
+        self.screen = screen_name
+        self._frames = []
+        self._frame_event = Clock.schedule_interval(self._on_frame, 0)
+    
+    def _on_frame(self, dt):
+        self._frames.append(dt * 1000)
+    
+    def _on_complete(self, *args):
+        if self._measuring is not None:
+            self._finish()
+            self._check_budget()
+    
+    def _finish(self):
+        self._frame_event.cancel()
+        record = self._measuring
+        frames = self._frames
+        record["duration_ms"] = (time.perf_counter() - record.pop("start")) * 1000
+        record["frames"] = len(frames)
+        record["avg_frame_ms"] = sum(frames) / len(frames) if frames else 0
+        record["max_frame_ms"] = max(frames) if frames else 0
+        self.records.append(record)
+        self._measuring = None
     
-    def is_quiz_complete(self):
-        """Check if quiz is finished"""
-        return self.current_question_idx >= len(self.questions)
+    def _check_budget(self):
+        """In auto mode, drop to no transition once animated ones run over budget"""
+        if self.mode != 'auto' or self.low_power:
+            return
+        animated = [r["avg_frame_ms"] for r in self.records if r["transition"] != 'none']
+        recent = sorted(animated[-self.AUTO_SAMPLES:])
+        if len(recent) == self.AUTO_SAMPLES and recent[len(recent) // 2] > self.FRAME_BUDGET_MS:
+            self.low_power = True
+            self.apply()
+    
+    def summary(self):
+        """Mode, last transition and per-route cost (times in ms)"""
+        routes = {}
+        for record in self.records:
+            route = routes.setdefault(f'{record["from"]}->{record["to"]}', {
+                "count": 0, "total_ms": 0, "max_frame_ms": 0})
+            route["count"] += 1
+            route["total_ms"] += record["duration_ms"]
+            route["max_frame_ms"] = max(route["max_frame_ms"], record["max_frame_ms"])
+        return {
+            "mode": self.mode,
+            "transition": self.transition_name,
+            "low_power": self.low_power,
+            "last": self.records[-1] if self.records else None,
+            "routes": {
+                name: {"count": r["count"], "avg_ms": r["total_ms"] / r["count"],
+                       "max_frame_ms": r["max_frame_ms"]}
+                for name, r in routes.items()
+            }
+        }
 
 
-# Global game data instance
-game_data = GameData()
+# Global transition engine instance
+transition_engine = TransitionEngine()
 
 
 # ============================================================================
 # CUSTOM WIDGETS
 # ============================================================================
 
-class ModernButton(Button):
-    """Custom styled button for mobile"""
+class RoundedButton(Button):
+    """Flat button drawn over a rounded rectangle background.
+
+    pos and size changes are coalesced through one clock trigger, so a
+    layout pass that moves and resizes the button rebuilds the rectangle
+    once, just before the frame is drawn.
+    """
+    bg_radius = 12
+    bg_default = (0.27, 0.28, 0.35, 1)
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.background_color = (0, 0, 0, 0)  # Transparent
         self.background_normal = ''
-        self.font_size = dp(18)
-        self.size_hint_y = None
-        self.height = dp(60)
-        self.bold = True
         
         with self.canvas.before:
-            self.bg_color = Color(0.31, 0.98, 0.48, 1)  # Green default
-            self.bg_rect = RoundedRectangle(radius=[dp(15)])
+            self.bg_color = Color(*self.bg_default)
+            self.bg_rect = RoundedRectangle(radius=[dp(self.bg_radius)])
         
-        self.bind(pos=self.update_rect, size=self.update_rect)
+        self._trigger_rect = Clock.create_trigger(self.update_rect, -1)
+        self.bind(pos=self._trigger_rect, size=self._trigger_rect)
     
     def update_rect(self, *args):
         self.bg_rect.pos = self.pos
         self.bg_rect.size = self.size
+
+
+class ModernButton(RoundedButton):
+    """Custom styled button for mobile"""
+    bg_radius = 15
+    bg_default = (0.31, 0.98, 0.48, 1)  # Green default
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.font_size = dp(18)
+        self.size_hint_y = None
+        self.height = dp(60)
+        self.bold = True
     
     def set_color(self, r, g, b, a=1):
         """Change button color"""
         self.bg_color.rgba = (r, g, b, a)
 
 
-class OptionButton(Button):
+class OptionButton(RoundedButton):
     """Quiz option button"""
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.background_color = (0, 0, 0, 0)
-        self.background_normal = ''
         self.font_size = dp(16)
         self.size_hint_y = None
         self.height = dp(70)
@@ -294,18 +464,10 @@ class OptionButton(Button):
         self.valign = 'middle'
         self.padding = [dp(20), 0]
         self.text_size = (None, None)
+        self.option_index = 0  # Position in question["options"]
         
-        with self.canvas.before:
-            self.bg_color = Color(0.27, 0.28, 0.35, 1)  # Neutral
-            self.bg_rect = RoundedRectangle(radius=[dp(12)])
-        
-        self.bind(pos=self.update_rect, size=self.update_rect)
         self.bind(size=self.update_text_size)
     
-    def update_rect(self, *args):
-        self.bg_rect.pos = self.pos
-        self.bg_rect.size = self.size
-    
     def update_text_size(self, *args):
         self.text_size = (self.width - dp(40), None)
     
@@ -319,7 +481,58 @@ class OptionButton(Button):
     
     def reset(self):
         """Reset to neutral color"""
-        self.bg_color.rgba = (0.27, 0.28, 0.35, 1)
+        self.bg_color.rgba = self.bg_default
+
+
+class QuestionPanel(BoxLayout):
+    """Question text plus its four option buttons.
+
+    QuizScreen keeps two of these and swaps them, so the next question
+    can be filled in and textured while the current one is still shown.
+    """
+    def __init__(self, on_option, **kwargs):
+        super().__init__(orientation='vertical', spacing=dp(10), **kwargs)
+        
+        self.question_text = Label(
+            text='',
+            font_size=dp(24),
+            size_hint_y=0.15,
+            bold=True,
+            color=(0.97, 0.97, 0.95, 1)
+        )
+        self.add_widget(self.question_text)
+        
+        self.options_layout = BoxLayout(orientation='vertical', spacing=dp(12), size_hint_y=0.6)
+        self.option_buttons = []
+        
+        for i in range(4):
+            btn = OptionButton(text=f'{chr(65+i)}. ')
+            btn.option_index = i
+            btn.bind(on_press=on_option)
+            self.option_buttons.append(btn)
+            self.options_layout.add_widget(btn)
+        
+        self.add_widget(self.options_layout)
+        self.question = None
+    
+    def fill(self, question):
+        """Set question and option texts"""
+        self.question = question
+        self.question_text.text = question["question"]
+        for i, btn in enumerate(self.option_buttons):
+            btn.text = f'{chr(65+i)}. {question["options"][i]}'
+            btn.reset()
+    
+    def prerender(self, question, like):
+        """Fill off-screen and bake label textures using the geometry of `like`"""
+        self.size = like.size
+        self.pos = like.pos
+        self.do_layout()
+        self.options_layout.do_layout()
+        self.fill(question)
+        self.question_text.texture_update()
+        for btn in self.option_buttons:
+            btn.texture_update()
 
 
 # ============================================================================
@@ -420,25 +633,24 @@ class DifficultyScreen(Screen):
         )
         layout.add_widget(subtitle)
         
-        # Difficulty buttons
-        btn_layout = BoxLayout(orientation='vertical', spacing=dp(15), size_hint_y=0.6)
+        # Difficulty buttons: built-in and custom profiles, then Adaptive
+        scroll = ScrollView(size_hint_y=0.6)
+        btn_layout = GridLayout(cols=1, spacing=dp(15), size_hint_y=None)
+        btn_layout.bind(minimum_height=btn_layout.setter('height'))
         
-        easy_btn = ModernButton(text='EASY - 30 Questions')
-        easy_btn.set_color(0.31, 0.98, 0.48)  # Green
-        easy_btn.bind(on_press=lambda x: self.start_quiz(30, 'Easy'))
-        btn_layout.add_widget(easy_btn)
+        for profile in game_data.profiles.values():
+            btn = ModernButton(text=f'{profile.name.upper()} - {profile.questions} Questions')
+            btn.set_color(*profile.color)
+            btn.bind(on_press=lambda x, p=profile: self.start_quiz(p.questions, p.name))
+            btn_layout.add_widget(btn)
         
-        medium_btn = ModernButton(text='MEDIUM - 50 Questions')
-        medium_btn.set_color(1, 0.72, 0.42)  # Orange
-        medium_btn.bind(on_press=lambda x: self.start_quiz(50, 'Medium'))
-        btn_layout.add_widget(medium_btn)
+        adaptive_btn = ModernButton(text='ADAPTIVE - 30 Questions')
+        adaptive_btn.set_color(0.55, 0.91, 0.99)  # Cyan
+        adaptive_btn.bind(on_press=lambda x: self.start_quiz(30, 'Adaptive'))
+        btn_layout.add_widget(adaptive_btn)
         
-        hard_btn = ModernButton(text='HARD - 100 Questions')
-        hard_btn.set_color(1, 0.33, 0.33)  # Red
-        hard_btn.bind(on_press=lambda x: self.start_quiz(100, 'Hard'))
-        btn_layout.add_widget(hard_btn)
-        
-        layout.add_widget(btn_layout)
+        scroll.add_widget(btn_layout)
+        layout.add_widget(scroll)
         
         # Back button
         back_btn = ModernButton(text='BACK', size_hint_y=0.15)
@@ -493,27 +705,11 @@ class QuizScreen(Screen):
         
         self.main_layout.add_widget(header)
         
-        # Question display
-        self.question_text = Label(
-            text='',
-            font_size=dp(24),
-            size_hint_y=0.15,
-            bold=True,
-            color=(0.97, 0.97, 0.95, 1)
-        )
-        self.main_layout.add_widget(self.question_text)
-        
-        # Options
-        self.options_layout = BoxLayout(orientation='vertical', spacing=dp(12), size_hint_y=0.6)
-        self.option_buttons = []
-        
-        for i in range(4):
-            btn = OptionButton(text=f'{chr(65+i)}. ')
-            btn.bind(on_press=self.check_answer)
-            self.option_buttons.append(btn)
-            self.options_layout.add_widget(btn)
-        
-        self.main_layout.add_widget(self.options_layout)
+        # Question and options, double-buffered (see QuestionPanel)
+        self.panels = [QuestionPanel(self.check_answer, size_hint_y=0.75),
+                       QuestionPanel(self.check_answer, size_hint_y=0.75)]
+        self.active_panel = 0
+        self.main_layout.add_widget(self.panels[0])
         
         # Feedback label
         self.feedback_label = Label(
@@ -529,10 +725,19 @@ class QuizScreen(Screen):
         self.answer_selected = False
         self.timer_event = None
     
+    @property
+    def question_text(self):
+        return self.panels[self.active_panel].question_text
+    
+    @property
+    def option_buttons(self):
+        return self.panels[self.active_panel].option_buttons
+    
     def on_enter(self):
         """Called when screen is displayed"""
-        if game_data.difficulty == "Hard":
-            self.timer_event = Clock.schedule_interval(self.update_timer, 0.1)
+        if game_data.time_limit is not None:
+            self.timer_event = Clock.schedule_interval(
+                perf_monitor.timed('update_timer', self.update_timer), 0.1)
     
     def on_leave(self):
         """Called when leaving screen"""
@@ -540,7 +745,7 @@ class QuizScreen(Screen):
             self.timer_event.cancel()
     
     def update_timer(self, dt):
-        """Update timer for Hard mode"""
+        """Update timer for timed modes"""
         remaining = game_data.get_time_remaining()
         if remaining is not None:
             self.timer_label.text = f'Time: {int(remaining)}s'
@@ -552,25 +757,24 @@ class QuizScreen(Screen):
                 self.time_up()
     
     def time_up(self):
-        """Handle time's up for Hard mode"""
+        """Handle time's up in timed modes"""
         self.answer_selected = True
         self.feedback_label.text = 'TIME\'S UP!'
         self.feedback_label.color = (1, 0.33, 0.33, 1)
         game_data.play_sound('wrong')
+        game_data.time_up()
         
         # Show correct answer
         question = game_data.get_current_question()
         if question:
-            correct_str = f"{question['correct']:.2f}" if isinstance(
-                question['correct'], float) else str(question['correct'])
-            
-            for btn in self.option_buttons:
-                option_text = btn.text.split('. ', 1)[1]
-                if option_text == correct_str:
-                    btn.set_correct()
+            self.option_buttons[question["correct_index"]].set_correct()
         
-        # Restart quiz after delay
-        Clock.schedule_once(lambda dt: self.restart_quiz(), 1.5)
+        # Restart quiz (or move on) after delay
+        if game_data.restart_on_miss:
+            Clock.schedule_once(perf_monitor.timed('restart_quiz', lambda dt: self.restart_quiz()), 1.5)
+        else:
+            Clock.schedule_once(perf_monitor.timed('prepare_next_question', self.prepare_next_question), 0)
+            Clock.schedule_once(perf_monitor.timed('next_question', lambda dt: self.next_question()), 1.5)
     
     def load_question(self):
         """Load current question"""
@@ -585,15 +789,24 @@ class QuizScreen(Screen):
         # Update UI
         self.score_label.text = f'Score: {game_data.score}'
         self.question_label.text = f'Q: {game_data.current_question_idx + 1}/{game_data.total_questions}'
-        self.question_text.text = question["question"]
         
-        # Update options
-        for i, btn in enumerate(self.option_buttons):
-            btn.text = f'{chr(65+i)}. {question["options"][i]}'
-            btn.reset()
+        # Swap in the back panel if it was pre-rendered for this question,
+        # otherwise fill the visible one directly
+        back = self.panels[1 - self.active_panel]
+        if back.question is question:
+            front = self.panels[self.active_panel]
+            index = self.main_layout.children.index(front)
+            self.main_layout.remove_widget(front)
+            self.main_layout.add_widget(back, index=index)
+            self.active_panel = 1 - self.active_panel
+            front.question = None
+        else:
+            self.panels[self.active_panel].fill(question)
+        
+        game_data.question_shown()
         
         # Reset timer display
-        if game_data.difficulty == "Hard":
+        if game_data.time_limit is not None:
             self.timer_label.text = f'Time: {game_data.time_limit}s'
             self.timer_label.color = (1, 0.72, 0.42, 1)
         else:
@@ -606,9 +819,7 @@ class QuizScreen(Screen):
         
         self.answer_selected = True
         
-        # Get selected option text
-        selected_text = instance.text.split('. ', 1)[1]
-        is_correct = game_data.check_answer(selected_text)
+        is_correct = game_data.check_answer(instance.option_index)
         
         # Update score
         if is_correct:
@@ -625,21 +836,26 @@ class QuizScreen(Screen):
         # Highlight answers
         question = game_data.get_current_question()
         if question:
-            correct_str = f"{question['correct']:.2f}" if isinstance(
-                question['correct'], float) else str(question['correct'])
-            
-            for btn in self.option_buttons:
-                option_text = btn.text.split('. ', 1)[1]
-                if option_text == correct_str:
-                    btn.set_correct()
-                elif btn == instance and not is_correct:
-                    btn.set_wrong()
+            self.option_buttons[question["correct_index"]].set_correct()
+            if not is_correct:
+                instance.set_wrong()
         
         # Proceed based on result
-        if game_data.difficulty == "Hard" and not is_correct:
-            Clock.schedule_once(lambda dt: self.restart_quiz(), 1.5)
+        if game_data.restart_on_miss and not is_correct:
+            Clock.schedule_once(perf_monitor.timed('restart_quiz', lambda dt: self.restart_quiz()), 1.5)
         else:
-            Clock.schedule_once(lambda dt: self.next_question(), 1.5)
+            # Pre-render on the next frame so the feedback frame stays light
+            Clock.schedule_once(perf_monitor.timed('prepare_next_question', self.prepare_next_question), 0)
+            Clock.schedule_once(perf_monitor.timed('next_question', lambda dt: self.next_question()), 1.5)
+    
+    def prepare_next_question(self, *args):
+        """Render the upcoming question into the hidden panel"""
+        question = game_data.peek_next_question()
+        if question is None:
+            return
+        
+        front = self.panels[self.active_panel]
+        self.panels[1 - self.active_panel].prerender(question, front)
     
     def next_question(self, *args):
         """Move to next question"""
@@ -651,8 +867,8 @@ class QuizScreen(Screen):
             self.load_question()
     
     def restart_quiz(self):
-        """Restart quiz for Hard mode"""
-        game_data.start_quiz(game_data.total_questions, game_data.difficulty)
+        """Restart quiz after a miss in restart_on_miss modes"""
+        game_data.restart_quiz()
         self.load_question()
     
     def finish_quiz(self):
@@ -909,6 +1125,28 @@ class SettingsScreen(Screen):
         self.sound_btn.bind(on_press=self.toggle_sound)
         settings_layout.add_widget(self.sound_btn)
         
+        self.perf_btn = ModernButton(text='Perf HUD: OFF')
+        self.perf_btn.set_color(0.27, 0.28, 0.35)
+        self.perf_btn.bind(on_press=self.toggle_perf_hud)
+        settings_layout.add_widget(self.perf_btn)
+        
+        dump_btn = ModernButton(text='Save Perf Log')
+        dump_btn.set_color(0.27, 0.28, 0.35)
+        dump_btn.bind(on_press=self.dump_perf_log)
+        settings_layout.add_widget(dump_btn)
+        
+        self.memory_btn = ModernButton(
+            text=f'Memory Snapshots: {"ON" if memory_profiler.enabled else "OFF"}')
+        self.memory_btn.set_color(0.27, 0.28, 0.35)
+        self.memory_btn.bind(on_press=self.toggle_memory_snapshots)
+        settings_layout.add_widget(self.memory_btn)
+        
+        self.transition_btn = ModernButton(text='')
+        self.transition_btn.set_color(0.27, 0.28, 0.35)
+        self.transition_btn.bind(on_press=self.cycle_transitions)
+        settings_layout.add_widget(self.transition_btn)
+        self.update_transition_btn()
+        
         info = Label(
             text='Tap buttons to toggle settings',
             font_size=dp(14),
@@ -932,6 +1170,34 @@ class SettingsScreen(Screen):
         game_data.sound_on = not game_data.sound_on
         self.sound_btn.text = f'Sound: {"ON" if game_data.sound_on else "OFF"}'
     
+    def toggle_perf_hud(self, instance):
+        """Toggle frame-time overlay"""
+        enabled = perf_monitor.toggle()
+        self.perf_btn.text = f'Perf HUD: {"ON" if enabled else "OFF"}'
+    
+    def toggle_memory_snapshots(self, instance):
+        """Toggle tracemalloc snapshots on screen changes"""
+        enabled = memory_profiler.toggle()
+        self.memory_btn.text = f'Memory Snapshots: {"ON" if enabled else "OFF"}'
+    
+    def on_enter(self):
+        # Auto mode may have switched to low power since the last visit
+        self.update_transition_btn()
+    
+    def update_transition_btn(self):
+        low_power = ' (low power)' if transition_engine.low_power else ''
+        self.transition_btn.text = f'Transitions: {transition_engine.mode.upper()}{low_power}'
+    
+    def cycle_transitions(self, instance):
+        """Cycle auto / fade / slide / none screen transitions"""
+        transition_engine.cycle()
+        self.update_transition_btn()
+    
+    def dump_perf_log(self, instance):
+        """Write perf history to PERF_LOG_FILE"""
+        path = perf_monitor.dump()
+        instance.text = f'Saved to {path}'
+    
     def go_back(self, instance):
         self.manager.current = 'main_menu'
 
@@ -996,7 +1262,7 @@ class MathHunterApp(App):
         Window.clearcolor = (0.10, 0.10, 0.14, 1)
         
         # Create screen manager
-        sm = ScreenManager(transition=FadeTransition())
+        sm = ScreenManager()
         
         # Add all screens
         sm.add_widget(MainMenuScreen(name='main_menu'))
@@ -1007,7 +1273,22 @@ class MathHunterApp(App):
         sm.add_widget(SettingsScreen(name='settings'))
         sm.add_widget(CreditsScreen(name='credits'))
         
+        transition_engine.attach(sm)
+        sm.bind(current=memory_profiler.on_screen)
+        memory_profiler.on_screen(sm, sm.current)
+        
+        # Build the Adaptive question index off the UI thread
+        threading.Thread(target=game_data.prepare_adaptive, daemon=True).start()
+        
         return sm
+    
+    def on_pause(self):
+        # Android may kill a paused app without calling on_stop
+        game_data.save_progress()
+        return True
+    
+    def on_stop(self):
+        game_data.save_progress()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,475 @@
+"""
+Math Hunter - Operator Registry
+Pluggable operators, precomputed operand tables and question sampling
+
+Every operator declares how it evaluates, what type its answer is, which
+right-hand operands it accepts, how far its operands may grow before the
+answer leaves the allowed range, and how wrong options are made. From
+that, a QuestionSampler precomputes every valid operand pair for a
+difficulty once, sorted by answer size, so drawing a question is a couple
+of random indexes into those tables: no eval and no retry loops.
+"""
+
+import bisect
+import hashlib
+import json
+import math
+from array import array
+from fractions import Fraction
+
+INT_LIMIT = 5000    # largest |answer| for whole-number questions
+FLOAT_LIMIT = 999   # largest |answer| for decimal and fraction questions
+ANSWER_TOLERANCE = 0.001  # a typed answer closer than this to the correct value is right
+INF = float('inf')
+
+
+# ============================================================================
+# DISTRACTORS
+# ============================================================================
+
+def int_distractors(correct, rng):
+    """Three distinct wrong answers within about 10% of correct"""
+    spread = max(2, abs(correct) // 10)
+    picks = rng.sample(range(2 * spread), 3)
+    return [correct + (k - spread if k < spread else k - spread + 1) for k in picks]
+
+
+def float_distractors(correct, rng):
+    """Three distinct wrong answers 0.10 to about 20% away, to 2 decimals"""
+    spread = max(11, int(abs(correct) * 20))  # in hundredths, at least 4 choices
+    span = spread - 9
+    picks = rng.sample(range(2 * span), 3)
+    offsets = [k + 10 if k < span else -(k - span + 10) for k in picks]
+    return [round(correct + k / 100, 2) for k in offsets]
+
+
+def fraction_distractors(correct, rng):
+    """Three distinct wrong fractions: numerator slips, reciprocal, denominator slip"""
+    p, q = correct.numerator, correct.denominator
+    candidates = [Fraction(p + 1, q), Fraction(p - 1, q), Fraction(p + 2, q), Fraction(p - 2, q),
+                  Fraction(p, q + 1)]
+    if p:
+        candidates.append(Fraction(q, p))
+    candidates = [c for c in dict.fromkeys(candidates) if c != correct]
+    return rng.sample(candidates, 3)
+
+
+def format_value(value, result_type):
+    """Option text for an answer value"""
+    if result_type == 'float':
+        return f"{value:.2f}"
+    if result_type == 'fraction':
+        return str(value.numerator) if value.denominator == 1 else f"{value.numerator}/{value.denominator}"
+    return str(int(value))
+
+
+def to_result(value, result_type):
+    """Normalise an evaluated value to the answer stored in the question"""
+    if result_type == 'float':
+        return round(float(value), 2)
+    if result_type == 'fraction':
+        return Fraction(value)
+    return int(value)
+
+
+def result_limit(result_type):
+    return INT_LIMIT if result_type == 'int' else FLOAT_LIMIT
+
+
+# ============================================================================
+# OPERATORS
+# ============================================================================
+
+class Operator:
+    """Base operator with an integer answer.
+
+    left_bound/right_bounds give the operand magnitudes that keep the answer
+    within limit; they may be conservative but must never let an answer
+    past the limit.
+    """
+    symbol = None
+    precedence = 1       # Python precedence: 1 for + -, 2 for * / // %, 3 for **
+    right_assoc = False
+    result_type = 'int'
+
+    def evaluate(self, a, b):
+        raise NotImplementedError
+
+    def right_range(self, lo, hi):
+        """Allowed right-hand operands given the difficulty's range"""
+        return lo, hi
+
+    def left_bound(self, right, limit):
+        """Largest |left| for which |left op right| <= limit"""
+        return INF
+
+    def right_bounds(self, left, limit):
+        """(min |right|, max |right|) for which left op right is valid and <= limit"""
+        return 0, INF
+
+    def distractors(self, correct, rng):
+        return DISTRACTORS[self.result_type](correct, rng)
+
+
+class Add(Operator):
+    symbol = '+'
+
+    def evaluate(self, a, b):
+        return a + b
+
+    def left_bound(self, right, limit):
+        return limit - abs(right)
+
+    def right_bounds(self, left, limit):
+        return 0, limit - abs(left)
+
+
+class Subtract(Add):
+    symbol = '-'
+
+    def evaluate(self, a, b):
+        return a - b
+
+
+class Multiply(Operator):
+    symbol = '*'
+    precedence = 2
+
+    def evaluate(self, a, b):
+        return a * b
+
+    def left_bound(self, right, limit):
+        return limit / abs(right) if right else INF
+
+    def right_bounds(self, left, limit):
+        return 0, (limit / abs(left) if left else INF)
+
+
+class FloorDivide(Operator):
+    symbol = '//'
+    precedence = 2
+
+    def evaluate(self, a, b):
+        return a // b
+
+    def right_range(self, lo, hi):
+        return max(1, lo), hi
+
+    def left_bound(self, right, limit):
+        return (limit - 1) * abs(right)
+
+    def right_bounds(self, left, limit):
+        return 1, INF
+
+
+class Divide(FloorDivide):
+    symbol = '/'
+    result_type = 'float'
+
+    def evaluate(self, a, b):
+        return a / b
+
+    def left_bound(self, right, limit):
+        return limit * abs(right)
+
+
+class Modulo(FloorDivide):
+    symbol = '%'
+
+    def evaluate(self, a, b):
+        return a % b
+
+    def right_range(self, lo, hi):
+        return max(2, lo), hi
+
+    def left_bound(self, right, limit):
+        return INF
+
+
+class Power(Operator):
+    """Small whole-number exponents only (squares and cubes)"""
+    symbol = '**'
+    precedence = 3
+    right_assoc = True
+
+    def evaluate(self, a, b):
+        return a ** b
+
+    def right_range(self, lo, hi):
+        return 2, 3
+
+    def left_bound(self, right, limit):
+        return limit ** (1 / right) if right >= 1 else INF
+
+    def right_bounds(self, left, limit):
+        if abs(left) <= 1:
+            return 0, INF
+        return 0, math.log(limit) / math.log(abs(left))
+
+
+class ExactDivide(FloorDivide):
+    """Division answered as an exact fraction, e.g. 7 ÷ 3 = 7/3"""
+    symbol = '÷'
+    result_type = 'fraction'
+
+    def evaluate(self, a, b):
+        # A float left side (from an earlier '/') keeps the whole answer a float
+        return a / b if isinstance(a, float) else Fraction(a, b)
+
+    def left_bound(self, right, limit):
+        return limit * abs(right)
+
+
+DISTRACTORS = {
+    'int': int_distractors,
+    'float': float_distractors,
+    'fraction': fraction_distractors,
+}
+
+OPERATORS = {}
+
+
+def register_operator(operator):
+    """Make an Operator instance available to difficulty presets by its symbol"""
+    OPERATORS[operator.symbol] = operator
+    return operator
+
+
+for _operator in (Add(), Subtract(), Multiply(), FloorDivide(), Divide(), Modulo(), Power(),
+                  ExactDivide()):
+    register_operator(_operator)
+
+
+# ============================================================================
+# OPERAND TABLES & SAMPLING
+# ============================================================================
+
+class OperandTable:
+    """Every (left, right) pair of one operator over two ranges, sorted by |answer|"""
+    def __init__(self, operator, left_range, right_range):
+        rows = sorted(
+            (abs(operator.evaluate(a, b)), a, b)
+            for a in range(left_range[0], left_range[1] + 1)
+            for b in range(right_range[0], right_range[1] + 1)
+        )
+        self.operator = operator
+        self.magnitudes = array('d', (row[0] for row in rows))
+        self.lefts = array('i', (row[1] for row in rows))
+        self.rights = array('i', (row[2] for row in rows))
+
+    def window(self, min_abs=0, max_abs=INF):
+        """Index range [lo, hi) of pairs whose |answer| lies in [min_abs, max_abs]"""
+        return (bisect.bisect_left(self.magnitudes, min_abs),
+                bisect.bisect_right(self.magnitudes, max_abs))
+
+    def pick(self, rng, lo, hi):
+        i = rng.randrange(lo, hi)
+        return self.lefts[i], self.rights[i]
+
+
+_tables = {}
+
+
+def get_table(operator, left_range, right_range):
+    """Shared OperandTable for an operator and operand ranges"""
+    key = (operator.symbol, left_range, right_range)
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = OperandTable(operator, left_range, right_range)
+    return table
+
+
+def composite_type(*operators):
+    """Answer type of an expression: float beats fraction beats int"""
+    types = [op.result_type for op in operators]
+    for result_type in ('float', 'fraction'):
+        if result_type in types:
+            return result_type, operators[types.index(result_type)]
+    return 'int', operators[0]
+
+
+def evaluate_expression(expression):
+    """Answer of 'a op b [op c]' with Python precedence, as (answer, result_type)"""
+    tokens = expression.split()
+    nums = [int(t) for t in tokens[::2]]
+    ops = [OPERATORS[t] for t in tokens[1::2]]
+
+    if len(ops) == 1:
+        value = ops[0].evaluate(nums[0], nums[1])
+        result_type = ops[0].result_type
+    else:
+        op1, op2 = ops
+        if op2.precedence > op1.precedence or (op1.right_assoc and op1 is op2):
+            value = op1.evaluate(nums[0], op2.evaluate(nums[1], nums[2]))
+        else:
+            value = op2.evaluate(op1.evaluate(nums[0], nums[1]), nums[2])
+        result_type, _ = composite_type(op1, op2)
+    return to_result(value, result_type), result_type
+
+
+def build_question(expression, correct, result_type, dominant, rng):
+    """Question dict with dominant's distractors shuffled in among the options"""
+    options = [correct] + dominant.distractors(correct, rng)
+    rng.shuffle(options)
+
+    return {
+        "question": f"What is {expression}?",
+        "expression": expression,
+        "options": [format_value(opt, result_type) for opt in options],
+        "correct": correct,
+        "correct_index": options.index(correct)
+    }
+
+
+def question_from_expression(expression, rng):
+    """Fresh question dict (new distractors) for an existing expression"""
+    correct, result_type = evaluate_expression(expression)
+    _, dominant = composite_type(*[OPERATORS[t] for t in expression.split()[1::2]])
+    return build_question(expression, correct, result_type, dominant, rng)
+
+
+def has_questions(num_min, num_max, operators):
+    """True when some two-part question fits the ranges and operators.
+
+    Checked from the operand ranges alone (operands are non-negative, so
+    the smallest |answer| lies on a corner of the ranges, or is 0 where they
+    overlap), without building the operand tables a QuestionSampler needs.
+    """
+    for symbol in operators:
+        op = OPERATORS[symbol]
+        r_lo, r_hi = op.right_range(max(1, num_min), num_max)
+        if r_lo > r_hi:
+            continue
+        pairs = [(a, b) for a in (num_min, num_max) for b in (r_lo, r_hi)]
+        overlap = max(num_min, r_lo)
+        if overlap <= min(num_max, r_hi):
+            pairs.append((overlap, overlap))
+        limit = result_limit(op.result_type)
+        if any(abs(op.evaluate(a, b)) <= limit for a, b in pairs):
+            return True
+    return False
+
+
+class QuestionSampler:
+    """Precomputed question source for one difficulty.
+
+    Two-part questions draw a pair from the operator's table window.
+    Three-part questions `a op1 b op2 c` follow Python precedence: when op2
+    binds tighter the (b, c) pair comes from op2's table, windowed by what
+    op1 allows next to a; otherwise (a, b) comes from op1's table, windowed
+    by what op2 allows next to c. Feasible a/c values and their windows are
+    listed up front, so sampling never retries.
+    """
+    def __init__(self, num_min, num_max, operators, three_part):
+        self.three_part = three_part
+        left = (num_min, num_max)
+        third = (max(1, num_min // 2), num_max // 2)
+        ops = [OPERATORS[symbol] for symbol in operators]
+
+        self.two_part = []
+        for op in ops:
+            table = get_table(op, left, op.right_range(max(1, num_min), num_max))
+            lo, hi = table.window(0, result_limit(op.result_type))
+            if hi > lo:
+                self.two_part.append((op, table, lo, hi))
+
+        self.three_part_combos = []
+        if three_part:
+            for op1 in ops:
+                for op2 in ops:
+                    combo = self._build_combo(op1, op2, left, third)
+                    if combo:
+                        self.three_part_combos.append(combo)
+
+    def _build_combo(self, op1, op2, left, third):
+        result_type, dominant = composite_type(op1, op2)
+        limit = result_limit(result_type)
+        right_first = op2.precedence > op1.precedence or (op1.right_assoc and op1 is op2)
+
+        entries = []
+        if right_first:
+            # a op1 (b op2 c): pick a, then (b, c) from op2's table
+            table = get_table(op2, left, op2.right_range(*third))
+            for a in range(left[0], left[1] + 1):
+                lo, hi = table.window(*op1.right_bounds(a, limit))
+                if hi > lo:
+                    entries.append((a, lo, hi))
+        else:
+            # (a op1 b) op2 c: pick c, then (a, b) from op1's table
+            table = get_table(op1, left, op1.right_range(max(1, left[0]), left[1]))
+            c_lo, c_hi = op2.right_range(*third)
+            for c in range(c_lo, c_hi + 1):
+                lo, hi = table.window(0, op2.left_bound(c, limit))
+                if hi > lo:
+                    entries.append((c, lo, hi))
+
+        if not entries:
+            return None
+        return (op1, op2, right_first, table, entries, result_type, dominant)
+
+    def question_space(self):
+        """Number of distinct expressions this sampler can produce"""
+        two_part = {op.symbol: hi - lo for op, _table, lo, hi in self.two_part}
+        three_part = {(combo[0].symbol, combo[1].symbol): sum(hi - lo for _single, lo, hi in combo[4])
+                      for combo in self.three_part_combos}
+        return sum(two_part.values()) + sum(three_part.values())
+
+    def expressions(self):
+        """Every distinct expression this sampler can produce"""
+        seen = set()
+        for op, table, lo, hi in self.two_part:
+            if op.symbol in seen:
+                continue
+            seen.add(op.symbol)
+            for i in range(lo, hi):
+                yield f"{table.lefts[i]} {op.symbol} {table.rights[i]}"
+        for op1, op2, right_first, table, entries, _result_type, _dominant in self.three_part_combos:
+            if (op1.symbol, op2.symbol) in seen:
+                continue
+            seen.add((op1.symbol, op2.symbol))
+            for single, lo, hi in entries:
+                for i in range(lo, hi):
+                    x, y = table.lefts[i], table.rights[i]
+                    a, b, c = (single, x, y) if right_first else (x, y, single)
+                    yield f"{a} {op1.symbol} {b} {op2.symbol} {c}"
+
+    def sample(self, rng):
+        """Build one question dict using rng (random.Random or the random module)"""
+        if self.three_part_combos and rng.random() < self.three_part:
+            op1, op2, right_first, table, entries, result_type, dominant = rng.choice(
+                self.three_part_combos)
+            single, lo, hi = rng.choice(entries)
+            x, y = table.pick(rng, lo, hi)
+            if right_first:
+                a, b, c = single, x, y
+                value = op1.evaluate(a, op2.evaluate(b, c))
+            else:
+                a, b, c = x, y, single
+                value = op2.evaluate(op1.evaluate(a, b), c)
+            expression = f"{a} {op1.symbol} {b} {op2.symbol} {c}"
+        else:
+            dominant, table, lo, hi = rng.choice(self.two_part)
+            result_type = dominant.result_type
+            a, b = table.pick(rng, lo, hi)
+            value = dominant.evaluate(a, b)
+            expression = f"{a} {dominant.symbol} {b}"
+
+        return build_question(expression, to_result(value, result_type), result_type, dominant, rng)
+
+
+_samplers = {}
+
+
+def sampler_key(num_min, num_max, operators, three_part):
+    """Stable hash of a set of difficulty parameters (the sampler cache key)"""
+    canonical = json.dumps([int(num_min), int(num_max), list(operators), float(three_part)])
+    return hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+
+
+def get_sampler(num_min, num_max, operators, three_part):
+    """Cached QuestionSampler for a set of difficulty parameters"""
+    key = sampler_key(num_min, num_max, operators, three_part)
+    sampler = _samplers.get(key)
+    if sampler is None:
+        sampler = _samplers[key] = QuestionSampler(num_min, num_max, operators, three_part)
+    return sampler
@@ -0,0 +1,178 @@
+"""
+Math Hunter - Difficulty Profiles
+Built-in and teacher-defined quiz modes
+
+Custom modes are read from difficulty_profiles.json:
+
+    {"profiles": [
+        {"name": "Times Tables", "num_min": 2, "num_max": 12, "operators": ["*"],
+         "questions": 20, "time_limit": null, "restart_on_miss": false}
+    ]}
+
+Omitted fields fall back to PROFILE_DEFAULTS. Loading only validates the
+parameters; a profile compiles to an operators.QuestionSampler the first
+time it is played, cached under the hash of its generation parameters,
+so profiles (or reloads) with the same parameters share one sampler and
+its operand tables.
+
+Usage:
+    python profiles.py difficulty_profiles.json
+"""
+
+import json
+import os
+import sys
+
+from operators import OPERATORS, get_sampler, has_questions, sampler_key
+
+PROFILES_FILE = "difficulty_profiles.json"
+
+MAX_OPERAND = 1000
+MAX_OPERAND_SPAN = 400  # operand tables grow with the square of the range
+MAX_QUESTIONS = 200
+MIN_TIME_LIMIT = 3
+
+PROFILE_DEFAULTS = {
+    "three_part": 0,
+    "questions": 20,
+    "time_limit": None,        # seconds per question, None for untimed
+    "restart_on_miss": False,  # a wrong answer or timeout restarts the quiz
+    "color": (0.74, 0.58, 0.98),
+}
+
+# Names with their own engine logic, not usable by custom profiles
+RESERVED_NAMES = ("Adaptive",)
+
+
+class DifficultyProfile:
+    """One quiz mode: generation parameters plus quiz rules"""
+    __slots__ = ('name', 'num_min', 'num_max', 'operators', 'three_part', 'questions',
+                 'time_limit', 'restart_on_miss', 'color', 'fingerprint', '_sampler')
+
+    def __init__(self, name, num_min, num_max, operators, three_part=0, questions=20,
+                 time_limit=None, restart_on_miss=False, color=PROFILE_DEFAULTS["color"]):
+        self.name = name
+        self.num_min = num_min
+        self.num_max = num_max
+        self.operators = list(operators)
+        self.three_part = three_part
+        self.questions = questions
+        self.time_limit = time_limit
+        self.restart_on_miss = restart_on_miss
+        self.color = tuple(color)
+        self.fingerprint = sampler_key(num_min, num_max, self.operators, three_part)
+        self._sampler = None
+
+    @property
+    def generation(self):
+        """(num_min, num_max, operators, three_part) as taken by GameData.generate_question"""
+        return self.num_min, self.num_max, self.operators, self.three_part
+
+    @property
+    def sampler(self):
+        """Compiled QuestionSampler (built on first use, shared by equal profiles)"""
+        if self._sampler is None:
+            self._sampler = get_sampler(*self.generation)
+        return self._sampler
+
+
+BUILTIN_PROFILES = {
+    "Easy": DifficultyProfile("Easy", 1, 12, ['+', '-', '*'], 0, questions=30,
+                              color=(0.31, 0.98, 0.48)),
+    "Medium": DifficultyProfile("Medium", 10, 50, ['+', '-', '*', '//'], 0, questions=50,
+                                color=(1, 0.72, 0.42)),
+    "Hard": DifficultyProfile("Hard", 20, 100, ['+', '-', '*', '/'], 0.4, questions=100,
+                              time_limit=15, restart_on_miss=True, color=(1, 0.33, 0.33)),
+}
+
+
+def profile_from_dict(data):
+    """Validated DifficultyProfile from a config entry; raises ValueError"""
+    try:
+        fields = dict(PROFILE_DEFAULTS, **data)
+        name = str(fields["name"]).strip()
+        num_min, num_max = int(fields["num_min"]), int(fields["num_max"])
+        operators = [str(op) for op in fields["operators"]]
+        three_part = float(fields["three_part"])
+        questions = int(fields["questions"])
+        time_limit = None if fields["time_limit"] is None else int(fields["time_limit"])
+        restart_on_miss = bool(fields["restart_on_miss"])
+        color = [float(c) for c in fields["color"]][:3]
+    except KeyError as e:
+        raise ValueError(f"missing field {e}")
+    except (TypeError, ValueError):
+        raise ValueError("field has the wrong type")
+
+    if not name or name in BUILTIN_PROFILES or name in RESERVED_NAMES:
+        raise ValueError(f"name {name!r} is empty or taken by a built-in mode")
+    if not 0 <= num_min <= num_max <= MAX_OPERAND:
+        raise ValueError(f"need 0 <= num_min <= num_max <= {MAX_OPERAND}")
+    if num_max - num_min > MAX_OPERAND_SPAN:
+        raise ValueError(f"num_max - num_min is over {MAX_OPERAND_SPAN}")
+    unknown = [op for op in operators if op not in OPERATORS]
+    if not operators or unknown:
+        raise ValueError(f"operators must be from {' '.join(OPERATORS)}")
+    if not 0 <= three_part <= 1:
+        raise ValueError("three_part must be between 0 and 1")
+    if not 1 <= questions <= MAX_QUESTIONS:
+        raise ValueError(f"questions must be 1 to {MAX_QUESTIONS}")
+    if time_limit is not None and time_limit < MIN_TIME_LIMIT:
+        raise ValueError(f"time_limit must be at least {MIN_TIME_LIMIT} seconds")
+    if len(color) != 3:
+        raise ValueError("color must be [r, g, b]")
+    if not has_questions(num_min, num_max, operators):
+        raise ValueError("no question fits these ranges and operators")
+
+    return DifficultyProfile(name, num_min, num_max, operators, three_part, questions,
+                             time_limit, restart_on_miss, color)
+
+
+_loaded = {}  # (path, mtime) -> profiles
+
+
+def load_profiles(path=PROFILES_FILE):
+    """Built-in profiles followed by the valid custom ones in path (by name).
+
+    Invalid entries are skipped with a warning. Results are cached per
+    file modification time.
+    """
+    if not path or not os.path.exists(path):
+        return dict(BUILTIN_PROFILES)
+
+    key = (path, os.path.getmtime(path))
+    profiles = _loaded.get(key)
+    if profiles is None:
+        profiles = dict(BUILTIN_PROFILES)
+        try:
+            with open(path, 'r') as f:
+                entries = json.load(f)["profiles"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: cannot read {path}: {e}")
+            entries = []
+        for i, entry in enumerate(entries):
+            try:
+                profile = profile_from_dict(entry)
+            except (ValueError, TypeError) as e:
+                print(f"Warning: skipping profile {i + 1} in {path}: {e}")
+                continue
+            if profile.name in profiles:
+                print(f"Warning: skipping duplicate profile {profile.name!r} in {path}")
+                continue
+            profiles[profile.name] = profile
+        _loaded[key] = profiles
+    return dict(profiles)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else PROFILES_FILE
+    print(f"{'name':<18}{'range':>10}  {'operators':<16}{'3-part':>7}{'questions':>10}"
+          f"{'time':>6}  fingerprint")
+    for profile in load_profiles(path).values():
+        time_limit = f"{profile.time_limit}s" if profile.time_limit else "-"
+        print(f"{profile.name:<18}{profile.num_min:>4} - {profile.num_max:<3}  "
+              f"{' '.join(profile.operators):<16}{profile.three_part:>7.2f}{profile.questions:>10}"
+              f"{time_limit:>6}  {profile.fingerprint}")
+
+
+if __name__ == '__main__':
+    main()
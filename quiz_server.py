@@ -0,0 +1,490 @@
+"""
+Math Hunter - Quiz HTTP Service
+Serve quizzes and grade answers over a small asyncio HTTP/1.1 server
+
+    GET  /quiz?difficulty=Hard&n=100[&seed=42]
+         -> {"quiz_id", "difficulty", "seed", "questions": [{"question", "options"}]}
+    POST /grade  {"quiz_id": ..., "answers": [option index, ...]}
+         -> {"score", "total", "results": [bool], "correct_indexes": [...]}
+    GET  /stats
+         -> request counts and server-side handling time percentiles
+
+A seeded quiz holds the same questions as GameData(seed=...) generates
+for that difficulty, so the web app and the mobile game agree. Unseeded
+quizzes are drawn from a pool of distinct questions per difficulty that
+is filled at start-up and topped up in the background; every question's
+JSON is encoded once, so serving a quiz is a sample and a join. A seeded
+quiz not in the cache is generated in a worker process so the event loop
+never waits on it. Answers are never sent to the client: quizzes are kept
+(up to QUIZ_CACHE_SIZE) and graded server-side with
+GameData.check_answer.
+
+Usage:
+    python quiz_server.py serve --port 8080
+    python quiz_server.py bench --clients 50 --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from game_engine import DEDUP_QUIZ_RETRIES, DIFFICULTY_PRESETS, GameData, question_fingerprint
+from latency_stats import percentile
+from operators import question_from_expression
+
+DEFAULT_PORT = 8080
+POOL_SIZE = 2000           # questions per difficulty for unseeded quizzes
+POOL_REFILL_COUNT = 50     # questions replaced per refill step
+POOL_REFILL_INTERVAL = 1.0 # seconds between refill steps
+QUIZ_CACHE_SIZE = 20000    # quizzes kept for grading
+SEEDED_WORKERS = 2         # processes generating seeded quizzes
+MAX_QUESTIONS = 200
+MAX_BODY = 64 * 1024
+TIMING_HISTORY = 100000
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_public(question):
+    """JSON for a question as the client sees it (no answer)"""
+    return json.dumps({"question": question["question"], "options": question["options"]}).encode()
+
+
+class Quiz:
+    """A served quiz: questions for grading plus their pre-encoded JSON"""
+    __slots__ = ('quiz_id', 'difficulty', 'seed', 'questions', 'encoded')
+
+    def __init__(self, quiz_id, difficulty, seed, questions, encoded):
+        self.quiz_id = quiz_id
+        self.difficulty = difficulty
+        self.seed = seed
+        self.questions = questions
+        self.encoded = encoded
+
+    def response(self):
+        head = json.dumps({"quiz_id": self.quiz_id, "difficulty": self.difficulty,
+                           "seed": self.seed})[:-1].encode()
+        return head + b', "questions": [' + b', '.join(self.encoded) + b']}'
+
+
+def seeded_quiz(difficulty, n, seed):
+    """Questions and encoded JSON of a seeded quiz (run in a worker process)"""
+    game = GameData(scoreboard_file=None, sounds=False, avoid_recent=False, seed=seed)
+    questions = game.generate_questions(n, difficulty)
+    return questions, [encode_public(q) for q in questions]
+
+
+class QuestionPool:
+    """Distinct pre-generated questions (with their encoded JSON) for one difficulty"""
+    def __init__(self, difficulty, size=POOL_SIZE):
+        self.difficulty = difficulty
+        self.game = GameData(scoreboard_file=None, sounds=False, avoid_recent=False)
+        self.sampler = self.game.profiles[difficulty].sampler
+        self.questions = self.game.generate_pool(size, difficulty)
+        self.encoded = [encode_public(q) for q in self.questions]
+        self.fingerprints = {question_fingerprint(q["expression"]) for q in self.questions}
+        self.next_refill = 0
+
+    def sample(self, n, rng):
+        """n distinct pool questions as (questions, encoded)"""
+        picks = rng.sample(range(len(self.questions)), min(n, len(self.questions)))
+        return [self.questions[i] for i in picks], [self.encoded[i] for i in picks]
+
+    def refill(self, count=POOL_REFILL_COUNT):
+        """Replace the oldest count questions with new ones not already in the pool
+        (or with fresh options for the same question once the space is used up)"""
+        rng = self.game.rng
+        for _ in range(min(count, len(self.questions))):
+            i = self.next_refill
+            old = self.questions[i]
+            for _attempt in range(DEDUP_QUIZ_RETRIES):
+                question = self.sampler.sample(rng)
+                fingerprint = question_fingerprint(question["expression"])
+                if fingerprint not in self.fingerprints:
+                    self.fingerprints.discard(question_fingerprint(old["expression"]))
+                    self.fingerprints.add(fingerprint)
+                    break
+            else:
+                question = question_from_expression(old["expression"], rng)
+            self.questions[i] = question
+            self.encoded[i] = encode_public(question)
+            self.next_refill = (i + 1) % len(self.questions)
+
+
+class QuizServer:
+    """Asyncio HTTP/1.1 server with keep-alive; call start() then serve"""
+    def __init__(self, pool_size=POOL_SIZE, cache_size=QUIZ_CACHE_SIZE):
+        self.pools = {difficulty: QuestionPool(difficulty, pool_size)
+                      for difficulty in DIFFICULTY_PRESETS}
+        self.quizzes = OrderedDict()  # quiz id -> Quiz, least recently used first
+        self.seeded = {}              # (difficulty, n, seed) -> quiz id
+        self.generating = {}          # (difficulty, n, seed) -> future of a seeded quiz in progress
+        self.cache_size = cache_size
+        self.grader = GameData(scoreboard_file=None, sounds=False, avoid_recent=False)
+        self.rng = random.Random()
+
+        self.requests = 0
+        self.handle_times = deque(maxlen=TIMING_HISTORY)  # seconds per request on the event loop
+        self.offloaded = {}  # handler task -> seconds spent waiting on a worker process
+        self.executor = None
+        self.server = None
+        self.port = None
+        self._refiller = None
+        self._handlers = set()
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        # Start the workers (and compile their samplers) now rather than on a request
+        self.executor = ProcessPoolExecutor(SEEDED_WORKERS)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, seeded_quiz, difficulty, 1, 0)
+                               for difficulty in DIFFICULTY_PRESETS))
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._refiller = asyncio.create_task(self._refill_loop())
+
+    async def close(self):
+        self._refiller.cancel()
+        self.server.close()
+        for task in self._handlers:
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self.server.wait_closed()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def _refill_loop(self):
+        while True:
+            for pool in self.pools.values():
+                await asyncio.sleep(POOL_REFILL_INTERVAL)
+                pool.refill()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.LimitOverrunError:
+                    writer.write(self.response(400, {"error": "headers too large"}, keep_alive=False))
+                    break
+
+                start = time.perf_counter()
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                body = b''
+                try:
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    writer.write(self.response(400, {"error": "bad Content-Length"}, keep_alive=False))
+                    break
+                if length > MAX_BODY:
+                    writer.write(self.response(413, {"error": "body too large"}, keep_alive=False))
+                    break
+                if length:
+                    body = await reader.readexactly(length)
+
+                try:
+                    method, target, _version = request_line.split(' ', 2)
+                    status, payload = 200, await self.route(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except ValueError:
+                    status, payload = 400, {"error": "malformed request"}
+
+                writer.write(self.response(status, payload, keep_alive))
+                self.requests += 1
+                self.handle_times.append(time.perf_counter() - start - self.offloaded.pop(task, 0))
+                if not keep_alive:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            self._handlers.discard(task)
+
+    @staticmethod
+    def response(status, payload, keep_alive=True):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        return (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Access-Control-Allow-Origin: *\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + body
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == '/quiz':
+            if method != 'GET':
+                raise HttpError(405, "use GET")
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            return await self.get_quiz(params.get('difficulty', 'Medium'), params.get('n', '10'),
+                                       params.get('seed'))
+        if url.path == '/grade':
+            if method != 'POST':
+                raise HttpError(405, "use POST")
+            try:
+                data = json.loads(body)
+                return self.grade(data["quiz_id"], data["answers"])
+            except (KeyError, TypeError, json.JSONDecodeError):
+                raise HttpError(400, "expected {\"quiz_id\": ..., \"answers\": [...]}")
+        if url.path == '/stats':
+            return self.stats()
+        raise HttpError(404, "unknown path")
+
+    # ------------------------------------------------------------------
+    # QUIZZES
+    # ------------------------------------------------------------------
+
+    async def get_quiz(self, difficulty, n, seed=None):
+        """Encoded response for a new (or cached seeded) quiz"""
+        if difficulty not in DIFFICULTY_PRESETS:
+            raise HttpError(400, f"difficulty must be one of {', '.join(DIFFICULTY_PRESETS)}")
+        n = int(n)
+        if not 1 <= n <= MAX_QUESTIONS:
+            raise HttpError(400, f"n must be 1 to {MAX_QUESTIONS}")
+
+        if seed is None:
+            questions, encoded = self.pools[difficulty].sample(n, self.rng)
+            quiz = Quiz(secrets.token_hex(8), difficulty, None, questions, encoded)
+        else:
+            seed = int(seed)
+            quiz = self.quizzes.get(self.seeded.get((difficulty, n, seed)))
+            if quiz is None:
+                quiz = await self.generate_seeded(difficulty, n, seed)
+        self.remember(quiz)
+        return quiz.response()
+
+    async def generate_seeded(self, difficulty, n, seed):
+        """Seeded quiz from a worker process (concurrent requests share one job)"""
+        key = (difficulty, n, seed)
+        future = self.generating.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.generating[key] = loop.run_in_executor(
+                self.executor, seeded_quiz, difficulty, n, seed)
+        start = time.perf_counter()
+        try:
+            questions, encoded = await asyncio.shield(future)
+        finally:
+            self.generating.pop(key, None)
+            task = asyncio.current_task()
+            self.offloaded[task] = self.offloaded.get(task, 0) + time.perf_counter() - start
+
+        quiz = self.quizzes.get(self.seeded.get(key))
+        if quiz is None:
+            quiz = Quiz(f"{difficulty}-{n}-{seed}", difficulty, seed, questions, encoded)
+            self.seeded[key] = quiz.quiz_id
+        return quiz
+
+    def remember(self, quiz):
+        self.quizzes[quiz.quiz_id] = quiz
+        self.quizzes.move_to_end(quiz.quiz_id)
+        while len(self.quizzes) > self.cache_size:
+            _, old = self.quizzes.popitem(last=False)
+            if old.seed is not None:
+                del self.seeded[(old.difficulty, len(old.questions), old.seed)]
+
+    def grade(self, quiz_id, answers):
+        """Grade option indexes against a served quiz with GameData.check_answer"""
+        quiz = self.quizzes.get(quiz_id)
+        if quiz is None:
+            raise HttpError(404, "unknown or expired quiz_id")
+        if not isinstance(answers, list) or len(answers) > len(quiz.questions):
+            raise HttpError(400, "answers must be a list no longer than the quiz")
+
+        game = self.grader
+        game.join_quiz(quiz.questions, quiz.difficulty)
+        results = []
+        for selected in answers:
+            is_correct = game.check_answer(selected)
+            if is_correct:
+                game.score += 1
+            results.append(is_correct)
+            game.next_question()
+        return {
+            "score": game.score,
+            "total": len(quiz.questions),
+            "results": results,
+            "correct_indexes": [q["correct_index"] for q in quiz.questions],
+        }
+
+    def stats(self):
+        times = sorted(self.handle_times)
+        return {
+            "requests": self.requests,
+            "quizzes": len(self.quizzes),
+            "handle_us": {  # event loop time, without waits on the seeded-quiz workers
+                "p50": percentile(times, 50) * 1e6,
+                "p99": percentile(times, 99) * 1e6,
+                "max": (times[-1] if times else 0) * 1e6,
+            },
+        }
+
+
+# ============================================================================
+# LOAD TEST
+# ============================================================================
+
+class HttpClient:
+    """Minimal keep-alive JSON client for the load test"""
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+
+    async def connect(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        length = 0
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        data = await self.reader.readexactly(length)
+        return int(status_line.split(' ', 2)[1]), json.loads(data)
+
+    def close(self):
+        self.writer.close()
+
+
+async def run_client(host, port, requests, seeded_share, rng, latencies, errors):
+    """Fetch quizzes and submit random answers until requests run out"""
+    client = HttpClient()
+    await client.connect(host, port)
+    try:
+        while requests:
+            difficulty = rng.choice(list(DIFFICULTY_PRESETS))
+            path = f"/quiz?difficulty={difficulty}&n={rng.choice((10, 30, 100))}"
+            if rng.random() < seeded_share:
+                path += f"&seed={rng.randrange(1000)}"
+
+            start = time.perf_counter()
+            status, quiz = await client.request('GET', path)
+            latencies['quiz'].append(time.perf_counter() - start)
+            requests -= 1
+            if status != 200:
+                errors.append(status)
+                continue
+            if not requests:
+                break
+
+            answers = [rng.randrange(len(q["options"])) for q in quiz["questions"]]
+            start = time.perf_counter()
+            status, _result = await client.request(
+                'POST', '/grade', {"quiz_id": quiz["quiz_id"], "answers": answers})
+            latencies['grade'].append(time.perf_counter() - start)
+            requests -= 1
+            if status != 200:
+                errors.append(status)
+    finally:
+        client.close()
+
+
+async def bench(clients, requests, seeded_share, host='127.0.0.1', port=None, seed=None):
+    """Load test a running server, or an in-process one when no port is given"""
+    server = None
+    if port is None:
+        server = QuizServer()
+        await server.start(port=0)
+        port = server.port
+
+    rng = random.Random(seed)
+    latencies = {'quiz': [], 'grade': []}
+    errors = []
+    per_client = [requests // clients + (1 if i < requests % clients else 0) for i in range(clients)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(host, port, count, seeded_share, random.Random(rng.random()), latencies, errors)
+        for count in per_client))
+    elapsed = time.perf_counter() - start
+
+    stats_client = HttpClient()
+    await stats_client.connect(host, port)
+    _status, stats = await stats_client.request('GET', '/stats')
+    stats_client.close()
+    if server is not None:
+        await server.close()
+
+    total = sum(len(samples) for samples in latencies.values())
+    print("=" * 60)
+    print(f"Clients: {clients}  requests: {total}  errors: {len(errors)}")
+    print(f"Elapsed: {elapsed:.2f}s  throughput: {total / elapsed:.0f} requests/s")
+    for name, samples in latencies.items():
+        ordered = sorted(samples)
+        print(f"{name:<6} round trip: p50 {percentile(ordered, 50) * 1e3:.2f}ms  "
+              f"p99 {percentile(ordered, 99) * 1e3:.2f}ms")
+    handle = stats["handle_us"]
+    print(f"Server handling: p50 {handle['p50']:.0f}us  p99 {handle['p99']:.0f}us  "
+          f"max {handle['max']:.0f}us")
+
+
+async def serve(host, port):
+    server = QuizServer()
+    await server.start(host=host, port=port)
+    print(f"Serving quizzes on http://{host}:{server.port}/quiz")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Hunter quiz HTTP service")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = sub.add_parser('serve', help="run the quiz service")
+    serve_parser.add_argument('--host', default='0.0.0.0')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+    bench_parser = sub.add_parser('bench', help="load test (in-process server unless --port)")
+    bench_parser.add_argument('--host', default='127.0.0.1')
+    bench_parser.add_argument('--port', type=int, default=None)
+    bench_parser.add_argument('--clients', type=int, default=50)
+    bench_parser.add_argument('--requests', type=int, default=20000)
+    bench_parser.add_argument('--seeded', type=float, default=0.2,
+                              help="share of quiz requests that pass a seed")
+    bench_parser.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+    try:
+        if args.command == 'serve':
+            asyncio.run(serve(args.host, args.port))
+        else:
+            asyncio.run(bench(args.clients, args.requests, args.seeded, args.host, args.port, args.seed))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,425 @@
+"""
+Math Hunter - Local Race Mode
+Head-to-head quiz over a compact asyncio socket protocol
+
+One device (or this script on a laptop) hosts a seeded quiz. Every player
+races through the same questions; the host grades each answer with its own
+GameData per player and sends back the result plus the next question.
+Standings are broadcast in batches, at most every BROADCAST_INTERVAL.
+
+A race takes only the questions from its difficulty, not the quiz rules:
+every player answers the same fixed list once, so a miss in a
+restart_on_miss mode (Hard) just scores zero instead of restarting, and
+there is no per-question time limit. Restarts would leave the race
+without an end.
+
+Usage:
+    python race.py host --port 8765 --difficulty Medium --questions 20
+    python race.py bench --clients 60
+"""
+
+import argparse
+import asyncio
+import random
+import socket
+import struct
+import time
+
+from game_engine import GameData
+from latency_stats import percentile
+
+DEFAULT_PORT = 8765
+BROADCAST_INTERVAL = 0.1  # seconds between standings broadcasts
+
+# Frame: payload length (u16), message type (u8), payload
+HEADER = struct.Struct('!HB')
+
+# Client -> host
+MSG_JOIN = 1        # name (utf-8)
+MSG_ANSWER = 2      # ANSWER
+# Host -> client
+MSG_WELCOME = 10    # WELCOME + difficulty (utf-8)
+MSG_QUESTION = 11   # u16 index + text and options (utf-8, FIELD_SEP separated)
+MSG_RESULT = 12     # RESULT
+MSG_ROSTER = 13     # u16 count + count x (u16 id, u8 name length, name)
+MSG_STANDINGS = 14  # u16 count + count x STANDING
+MSG_FINISH = 15     # same layout as MSG_STANDINGS, final
+
+ANSWER = struct.Struct('!HB')        # question index, option index
+WELCOME = struct.Struct('!HHI')      # player id, question count, seed
+RESULT = struct.Struct('!HBBH')      # question index, correct, correct index, score
+STANDING = struct.Struct('!HHH')     # player id, score, questions answered
+U16 = struct.Struct('!H')
+MAX_PAYLOAD = 0xFFFF   # frame length is a u16
+MAX_NAME_BYTES = 255   # roster name length is a u8
+FIELD_SEP = '\x1f'
+
+
+def clip_name(name):
+    """name cut to MAX_NAME_BYTES of UTF-8 without splitting a character"""
+    return name.encode()[:MAX_NAME_BYTES].decode('utf-8', 'ignore')
+
+
+def encode_frame(msg_type, payload=b''):
+    return HEADER.pack(len(payload), msg_type) + payload
+
+
+async def read_frame(reader):
+    """Read one (msg_type, payload) frame"""
+    length, msg_type = HEADER.unpack(await reader.readexactly(HEADER.size))
+    payload = await reader.readexactly(length) if length else b''
+    return msg_type, payload
+
+
+def encode_question(index, question):
+    text = FIELD_SEP.join([question["question"]] + question["options"])
+    return encode_frame(MSG_QUESTION, U16.pack(index) + text.encode())
+
+
+def decode_question(payload):
+    """(index, question text, options) from a MSG_QUESTION payload"""
+    index, = U16.unpack_from(payload)
+    fields = payload[U16.size:].decode().split(FIELD_SEP)
+    return index, fields[0], fields[1:]
+
+
+def decode_standings(payload):
+    """[(player id, score, answered), ...] from MSG_STANDINGS / MSG_FINISH"""
+    count, = U16.unpack_from(payload)
+    return [STANDING.unpack_from(payload, U16.size + i * STANDING.size) for i in range(count)]
+
+
+def decode_roster(payload):
+    """{player id: name} from a MSG_ROSTER payload"""
+    count, = U16.unpack_from(payload)
+    roster = {}
+    offset = U16.size
+    for _ in range(count):
+        player_id, = U16.unpack_from(payload, offset)
+        length = payload[offset + 2]
+        roster[player_id] = payload[offset + 3:offset + 3 + length].decode(errors='replace')
+        offset += 3 + length
+    return roster
+
+
+# ============================================================================
+# HOST
+# ============================================================================
+
+class RacePlayer:
+    """One connected player and their grading state"""
+    __slots__ = ('player_id', 'name', 'writer', 'game', 'finished')
+
+    def __init__(self, player_id, name, writer):
+        self.player_id = player_id
+        self.name = name
+        self.writer = writer
+        self.game = GameData(scoreboard_file=None, sounds=False, avoid_recent=False)
+        self.finished = False
+
+
+class RaceServer:
+    """Hosts one seeded race; call start(), wait for players, then begin()"""
+    def __init__(self, difficulty="Medium", num_questions=20, seed=None,
+                 broadcast_interval=BROADCAST_INTERVAL):
+        self.difficulty = difficulty
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        quiz = GameData(scoreboard_file=None, sounds=False, avoid_recent=False, seed=self.seed)
+        self.questions = quiz.generate_questions(num_questions, difficulty)
+        # Question frames never change, so encode them once
+        self.question_frames = [encode_question(i, q) for i, q in enumerate(self.questions)]
+
+        self.broadcast_interval = broadcast_interval
+        self.players = {}
+        self.results = {}  # player id -> (name, score, questions answered), kept after disconnects
+        self.next_player_id = 1
+        self.started = False
+        self.standings_dirty = False
+        self.roster_dirty = False
+        self.answer_times = []  # host processing time per answer, seconds
+
+        self.server = None
+        self.port = None
+        self.finished = None
+        self._broadcaster = None
+        self._handlers = set()
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.finished = asyncio.Event()
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._broadcaster = asyncio.create_task(self._broadcast_loop())
+
+    async def close(self):
+        self._broadcaster.cancel()
+        for player in self.players.values():
+            player.writer.close()
+        self.server.close()
+        # Let client handlers see the closed connections and exit cleanly
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    def begin(self):
+        """Start the race: everyone gets question 0"""
+        self.started = True
+        for player in self.players.values():
+            player.game.join_quiz(self.questions, self.difficulty)
+            player.writer.write(self.question_frames[0])
+
+    async def handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        player = None
+        try:
+            while True:
+                msg_type, payload = await read_frame(reader)
+                if msg_type == MSG_JOIN and player is None:
+                    player = self.add_player(clip_name(payload.decode(errors='replace')) or 'Player', writer)
+                elif msg_type == MSG_ANSWER and player is not None:
+                    self.handle_answer(player, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if player is not None:
+                del self.players[player.player_id]
+                self.roster_dirty = self.standings_dirty = True
+                self._check_finished()
+            writer.close()
+            self._handlers.discard(task)
+
+    def add_player(self, name, writer):
+        player = RacePlayer(self.next_player_id, name, writer)
+        self.next_player_id += 1
+        self.players[player.player_id] = player
+        writer.write(encode_frame(
+            MSG_WELCOME,
+            WELCOME.pack(player.player_id, len(self.questions), self.seed & 0xFFFFFFFF)
+            + self.difficulty.encode()))
+        if self.started:
+            player.game.join_quiz(self.questions, self.difficulty)
+            writer.write(self.question_frames[0])
+        self.roster_dirty = True
+        return player
+
+    def handle_answer(self, player, payload):
+        """Grade one answer and reply with the result and the next question"""
+        start = time.perf_counter()
+        if len(payload) != ANSWER.size:
+            return  # malformed frame
+        index, option = ANSWER.unpack(payload)
+        game = player.game
+        if not self.started or player.finished or index != game.current_question_idx:
+            return  # stale or duplicate answer
+
+        question = game.get_current_question()
+        is_correct = game.check_answer(option)
+        if is_correct:
+            game.score += 1
+        game.next_question()
+
+        reply = encode_frame(MSG_RESULT, RESULT.pack(
+            index, is_correct, question["correct_index"], game.score))
+        if game.is_quiz_complete():
+            player.finished = True
+            self.results[player.player_id] = (player.name, game.score, game.current_question_idx)
+        else:
+            reply += self.question_frames[game.current_question_idx]
+        player.writer.write(reply)
+
+        self.standings_dirty = True
+        self.answer_times.append(time.perf_counter() - start)
+        if player.finished:
+            self._check_finished()
+
+    def standings_payload(self):
+        """Standings, best first (only the leaders when everyone would not fit a frame)"""
+        ranked = sorted(self.players.values(),
+                        key=lambda p: (p.game.score, p.game.current_question_idx), reverse=True)
+        ranked = ranked[:(MAX_PAYLOAD - U16.size) // STANDING.size]
+        return U16.pack(len(ranked)) + b''.join(
+            STANDING.pack(p.player_id, p.game.score, p.game.current_question_idx) for p in ranked)
+
+    def final_standings(self):
+        """[(name, score, answered), ...] of every player who finished, best first"""
+        return sorted(self.results.values(), key=lambda r: (r[1], r[2]), reverse=True)
+
+    def roster_payload(self):
+        """Roster of players in join order (those past the frame size limit are left out)"""
+        entries = []
+        size = U16.size
+        for player in self.players.values():
+            name = player.name.encode()
+            entry = U16.pack(player.player_id) + bytes([len(name)]) + name
+            if size + len(entry) > MAX_PAYLOAD:
+                break
+            entries.append(entry)
+            size += len(entry)
+        return U16.pack(len(entries)) + b''.join(entries)
+
+    def broadcast(self, frame):
+        for player in self.players.values():
+            if not player.writer.is_closing():
+                player.writer.write(frame)
+
+    async def _broadcast_loop(self):
+        while True:
+            await asyncio.sleep(self.broadcast_interval)
+            if self.roster_dirty:
+                self.roster_dirty = False
+                self.broadcast(encode_frame(MSG_ROSTER, self.roster_payload()))
+            if self.standings_dirty and self.started:
+                self.standings_dirty = False
+                self.broadcast(encode_frame(MSG_STANDINGS, self.standings_payload()))
+
+    def _check_finished(self):
+        if self.finished.is_set():
+            return
+        if self.started and self.players and all(p.finished for p in self.players.values()):
+            self.broadcast(encode_frame(MSG_FINISH, self.standings_payload()))
+            self.finished.set()
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+class RaceClient:
+    """Player side of the protocol"""
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.player_id = None
+        self.num_questions = 0
+        self.seed = None
+        self.difficulty = ""
+
+    async def connect(self, name, host='127.0.0.1', port=DEFAULT_PORT):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        sock = self.writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.writer.write(encode_frame(MSG_JOIN, name.encode()))
+
+        msg_type, payload = await read_frame(self.reader)
+        if msg_type != MSG_WELCOME:
+            raise ConnectionError(f"expected welcome, got message {msg_type}")
+        self.player_id, self.num_questions, self.seed = WELCOME.unpack_from(payload)
+        self.difficulty = payload[WELCOME.size:].decode()
+
+    def answer(self, index, option):
+        self.writer.write(encode_frame(MSG_ANSWER, ANSWER.pack(index, option)))
+
+    async def receive(self):
+        """Next (msg_type, payload) from the host"""
+        return await read_frame(self.reader)
+
+    def close(self):
+        self.writer.close()
+
+
+# ============================================================================
+# LOAD TEST
+# ============================================================================
+
+async def run_bot(name, port, accuracy, rng, round_trips, joined):
+    """Answer every question as soon as it arrives; records round-trip times"""
+    client = RaceClient()
+    await client.connect(name, port=port)
+    joined.release()
+    sent_at = None
+    try:
+        while True:
+            msg_type, payload = await client.receive()
+            if msg_type == MSG_QUESTION:
+                index, _text, options = decode_question(payload)
+                sent_at = time.perf_counter()
+                # Bots do not see the answer key, so 'accuracy' is a right-guess bias
+                option = 0 if rng.random() < accuracy else rng.randrange(len(options))
+                client.answer(index, option)
+            elif msg_type == MSG_RESULT and sent_at is not None:
+                round_trips.append(time.perf_counter() - sent_at)
+                sent_at = None
+            elif msg_type == MSG_FINISH:
+                return decode_standings(payload)
+    finally:
+        client.close()
+
+
+async def bench(clients, difficulty, num_questions, accuracy, seed):
+    server = RaceServer(difficulty, num_questions, seed)
+    await server.start(port=0)
+
+    rng = random.Random(seed)
+    round_trips = []
+    joined = asyncio.Semaphore(0)
+    bots = [asyncio.create_task(run_bot(f'bot{i}', server.port, accuracy, rng, round_trips, joined))
+            for i in range(clients)]
+    for _ in range(clients):
+        await joined.acquire()
+    while len(server.players) < clients:
+        await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    server.begin()
+    results = await asyncio.gather(*bots)
+    elapsed = time.perf_counter() - start
+    await server.close()
+
+    answers = sorted(server.answer_times)
+    trips = sorted(round_trips)
+    print("=" * 60)
+    print(f"Clients: {clients}  questions: {num_questions}  answers: {len(answers)}")
+    print(f"Elapsed: {elapsed:.2f}s  throughput: {len(answers) / elapsed:.0f} answers/s")
+    print(f"Host processing per answer: p50 {percentile(answers, 50) * 1e6:.0f}us  "
+          f"p99 {percentile(answers, 99) * 1e6:.0f}us  max {answers[-1] * 1e6:.0f}us")
+    print(f"Client round trip:          p50 {percentile(trips, 50) * 1e3:.2f}ms  "
+          f"p99 {percentile(trips, 99) * 1e3:.2f}ms")
+    print(f"Winner: player {results[0][0][0]} with {results[0][0][1]}/{num_questions}")
+
+
+async def host(port, difficulty, num_questions, seed, players):
+    server = RaceServer(difficulty, num_questions, seed)
+    await server.start(host='0.0.0.0', port=port)
+    print(f"Hosting {difficulty} race ({num_questions} questions, seed {server.seed}) on port {server.port}")
+    print(f"Waiting for {players} players...")
+    while len(server.players) < players:
+        await asyncio.sleep(0.1)
+    server.begin()
+    print("Race started!")
+    await server.finished.wait()
+    await asyncio.sleep(server.broadcast_interval)
+    for name, score, _answered in server.final_standings():
+        print(f"  {name}: {score}/{num_questions}")
+    await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Hunter local race mode")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    host_parser = sub.add_parser('host', help="host a race and wait for players")
+    host_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    host_parser.add_argument('--players', type=int, default=2)
+
+    bench_parser = sub.add_parser('bench', help="load test against a local host")
+    bench_parser.add_argument('--clients', type=int, default=60)
+    bench_parser.add_argument('--accuracy', type=float, default=0.5)
+
+    for p in (host_parser, bench_parser):
+        p.add_argument('--difficulty', choices=['Easy', 'Medium', 'Hard'], default='Medium')
+        p.add_argument('--questions', type=int, default=20)
+        p.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+    if args.command == 'host':
+        asyncio.run(host(args.port, args.difficulty, args.questions, args.seed, args.players))
+    else:
+        asyncio.run(bench(args.clients, args.difficulty, args.questions, args.accuracy, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Math Hunter - Spaced-Repetition Review
+Missed questions come back in later quizzes until they are answered right
+
+A missed question is due straight away (so a Hard-mode restart sees it
+again) and each correct review pushes it further out along
+REVIEW_INTERVALS; a miss sends it back to the start, and a correct answer
+at the last step retires it.
+
+Due questions sit in one heap per difficulty keyed by due time, so every
+schedule and lookup is O(log n). Rescheduling pushes a new heap entry and
+leaves the old one to be skipped when it surfaces (checked against the
+live state), and a heap is rebuilt once stale entries outnumber live ones.
+
+The queue is persisted as an append-only log of fixed-size records, one
+per state change; loading keeps the last record per question and the log
+is compacted when it has grown well past the live state.
+
+Usage:
+    python review.py review.bin
+"""
+
+import heapq
+import os
+import struct
+import sys
+import time
+
+from session_log import DIFFICULTY_CODES, OPERATOR_CODES, _encode_expression
+
+REVIEW_FILE = "review.bin"
+
+# Seconds until the next review after 0, 1, 2, ... correct reviews in a row
+REVIEW_INTERVALS = (0, 10 * 60, 60 * 60, 24 * 3600, 3 * 24 * 3600, 7 * 24 * 3600)
+REVIEW_MIX_SHARE = 0.2  # at most this share of a quiz is review questions
+COMPACT_MIN_RECORDS = 4096
+
+RETIRED = -1  # due_ms of a record that removes its question
+
+# due_ms, streak, difficulty, op1, op2, num1, num2, num3
+RECORD = struct.Struct('<qBBBBiii')
+
+
+def _decode_expression(op1, op2, num1, num2, num3):
+    expression = f"{num1} {OPERATOR_CODES[op1]} {num2}"
+    if op2:
+        expression += f" {OPERATOR_CODES[op2]} {num3}"
+    return expression
+
+
+class ReviewQueue:
+    """Missed questions scheduled for review, optionally backed by a file"""
+    def __init__(self, path=None):
+        self.path = path
+        self.items = {}  # expression -> (due_ms, streak, difficulty)
+        self.heaps = {}  # difficulty -> [(due_ms, expression), ...]
+        self.records = 0
+        self.file = None
+
+        if path and os.path.exists(path):
+            self.load(path)
+            if self.records > max(COMPACT_MIN_RECORDS, 2 * len(self.items)):
+                self.compact()
+        if path:
+            self.file = open(path, 'ab')
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, expression):
+        return expression in self.items
+
+    def load(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        data = data[:len(data) - len(data) % RECORD.size]  # drop a torn trailing record
+        items = {}
+        for due_ms, streak, difficulty, *expression in RECORD.iter_unpack(data):
+            key = _decode_expression(*expression)
+            if due_ms == RETIRED:
+                items.pop(key, None)
+            else:
+                items[key] = (due_ms, streak, DIFFICULTY_CODES[difficulty])
+        self.records = len(data) // RECORD.size
+        self.items = items
+        self._rebuild_heaps()
+
+    def _rebuild_heaps(self, difficulty=None):
+        if difficulty is None:
+            self.heaps = {}
+            for expression, (due_ms, _streak, item_difficulty) in self.items.items():
+                self.heaps.setdefault(item_difficulty, []).append((due_ms, expression))
+            heaps = self.heaps.values()
+        else:
+            heaps = [self.heaps[difficulty]]
+            heaps[0][:] = [(due_ms, expression)
+                           for expression, (due_ms, _streak, item_difficulty) in self.items.items()
+                           if item_difficulty == difficulty]
+        for heap in heaps:
+            heapq.heapify(heap)
+
+    def compact(self):
+        """Rewrite the log with one record per live question"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for expression, state in self.items.items():
+                f.write(self._pack(expression, *state))
+        os.replace(tmp_path, self.path)
+        self.records = len(self.items)
+
+    @staticmethod
+    def _pack(expression, due_ms, streak, difficulty):
+        code = DIFFICULTY_CODES.index(difficulty) if difficulty in DIFFICULTY_CODES else 0
+        return RECORD.pack(due_ms, streak, code, *_encode_expression(expression))
+
+    def _set(self, expression, due_ms, streak, difficulty):
+        if due_ms == RETIRED:
+            del self.items[expression]
+        else:
+            self.items[expression] = (due_ms, streak, difficulty)
+            heap = self.heaps.setdefault(difficulty, [])
+            heapq.heappush(heap, (due_ms, expression))
+            if len(heap) > 2 * len(self.items) + 64:
+                self._rebuild_heaps(difficulty)
+        if self.file:
+            self.file.write(self._pack(expression, due_ms, streak, difficulty))
+            self.records += 1
+
+    def record(self, expression, difficulty, correct, now=None):
+        """Reschedule after an answer: a miss is due now, a correct review moves on a step"""
+        now_ms = int((time.time() if now is None else now) * 1000)
+        state = self.items.get(expression)
+        if correct:
+            if state is None:
+                return
+            _due_ms, streak, difficulty = state
+            streak += 1
+            if streak >= len(REVIEW_INTERVALS):
+                self._set(expression, RETIRED, streak, difficulty)
+            else:
+                self._set(expression, now_ms + REVIEW_INTERVALS[streak] * 1000, streak, difficulty)
+        else:
+            self._set(expression, now_ms + REVIEW_INTERVALS[0] * 1000, 0, difficulty)
+
+    def due(self, difficulty, limit, now=None):
+        """Up to limit due expressions for a difficulty, most overdue first (left queued)"""
+        heap = self.heaps.get(difficulty)
+        if not heap or limit <= 0:
+            return []
+        now_ms = int((time.time() if now is None else now) * 1000)
+
+        taken = []
+        popped = []
+        while heap and heap[0][0] <= now_ms and len(taken) < limit:
+            entry = heapq.heappop(heap)
+            due_ms, expression = entry
+            state = self.items.get(expression)
+            if state is None or state[0] != due_ms or state[2] != difficulty or expression in taken:
+                continue  # stale entry
+            taken.append(expression)
+            popped.append(entry)
+        # Still due until answered
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return taken
+
+    def flush(self):
+        if self.file:
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else REVIEW_FILE
+    queue = ReviewQueue()
+    queue.path = path
+    queue.load(path)
+    now_ms = int(time.time() * 1000)
+    print(f"{'difficulty':<12}{'queued':>8}{'due':>8}")
+    for difficulty in sorted(queue.heaps):
+        states = [state for state in queue.items.values() if state[2] == difficulty]
+        due = sum(1 for state in states if state[0] <= now_ms)
+        print(f"{difficulty:<12}{len(states):>8}{due:>8}")
+    print(f"{len(queue)} questions queued, {queue.records} log records")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Math Hunter - Scoreboard Merge
+Combine scoreboards from many devices into global and per-difficulty top-N
+
+Inputs are scoreboard.json files (a JSON list, as GameData.save_scores
+writes) or journals (one JSON entry per line, .jsonl, in any order). Each
+input is streamed through a bounded heap per difficulty, and the inputs
+are then combined with a k-way heap merge on the scoreboard ordering
+(score, then total, highest first; within a difficulty ties keep input
+order). Memory depends on top_n and the number of inputs, never on how
+many entries they hold.
+
+Usage:
+    python scoreboard_merge.py device1.json device2.json scores.jsonl --top 10 --dedupe
+    python scoreboard_merge.py devices/*.json --output scoreboard.json
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+
+ENTRY_FIELDS = ("name", "date", "time", "difficulty", "score", "total")
+
+
+def entry_key(entry):
+    """Scoreboard ordering key, the same one load_scores sorts by"""
+    return entry['score'], entry['total']
+
+
+def entry_identity(entry):
+    """Fields that make two entries the same result"""
+    return tuple(entry.get(field) for field in ENTRY_FIELDS)
+
+
+def read_entries(path):
+    """Stream valid entries from a scoreboard.json file or a .jsonl journal"""
+    with open(path, 'r') as f:
+        if path.endswith('.jsonl'):
+            entries = (json.loads(line) for line in f if line.strip())
+        else:
+            entries = json.load(f)
+        for entry in entries:
+            try:
+                entry['score'], entry['total'] = int(entry['score']), int(entry['total'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            yield entry
+
+
+class TopN:
+    """Best n entries pushed so far, in O(n) memory"""
+    def __init__(self, n, dedupe=False):
+        self.n = n
+        self.heap = []  # min-heap of (score, total, -seq, entry): the root is the worst kept
+        self.members = set() if dedupe else None
+        self.seq = itertools.count()
+
+    def push(self, entry):
+        identity = None
+        if self.members is not None:
+            identity = entry_identity(entry)
+            if identity in self.members:
+                return
+        item = (*entry_key(entry), -next(self.seq), entry)
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, item)
+        elif item[:3] > self.heap[0][:3]:
+            dropped = heapq.heapreplace(self.heap, item)[-1]
+            if self.members is not None:
+                self.members.discard(entry_identity(dropped))
+        else:
+            return
+        if identity is not None:
+            self.members.add(identity)
+
+    def sorted(self):
+        """Kept entries, best first"""
+        return [item[-1] for item in sorted(self.heap, key=lambda item: item[:3], reverse=True)]
+
+
+def source_tops(path, top_n, dedupe=False):
+    """{difficulty: best top_n entries, best first} for one input"""
+    tops = {}
+    for entry in read_entries(path):
+        difficulty = entry.get('difficulty', '')
+        top = tops.get(difficulty)
+        if top is None:
+            top = tops[difficulty] = TopN(top_n, dedupe)
+        top.push(entry)
+    return {difficulty: top.sorted() for difficulty, top in tops.items()}
+
+
+def take(stream, n, dedupe=False):
+    """First n entries of a best-first stream, skipping repeats if dedupe.
+
+    Identical entries share a key, so only the current run of equal keys
+    has to be remembered.
+    """
+    result = []
+    run_key = None
+    seen = set()
+    for entry in stream:
+        if dedupe:
+            key = entry_key(entry)
+            if key != run_key:
+                run_key = key
+                seen = set()
+            identity = entry_identity(entry)
+            if identity in seen:
+                continue
+            seen.add(identity)
+        result.append(entry)
+        if len(result) >= n:
+            break
+    return result
+
+
+def merge_best_first(streams):
+    return heapq.merge(*streams, key=entry_key, reverse=True)
+
+
+def merge_scoreboards(paths, top_n=10, dedupe=False):
+    """Merge scoreboards and journals.
+
+    Returns {"all": global top_n, "by_difficulty": {difficulty: top_n}}, each
+    best first. With dedupe, identical entries (same name, date, time,
+    difficulty, score and total) count once.
+    """
+    sources = [source_tops(path, top_n, dedupe) for path in paths]
+    difficulties = sorted({difficulty for tops in sources for difficulty in tops})
+
+    by_difficulty = {
+        difficulty: take(merge_best_first(tops.get(difficulty, ()) for tops in sources), top_n, dedupe)
+        for difficulty in difficulties
+    }
+    # The global top_n is always within the union of the per-difficulty ones
+    overall = take(merge_best_first(by_difficulty.values()), top_n, dedupe)
+    return {"all": overall, "by_difficulty": by_difficulty}
+
+
+def print_board(title, entries):
+    print(title)
+    for i, entry in enumerate(entries, 1):
+        print(f"  {i:>3}. {str(entry.get('name', '')):<20}{entry['score']:>5}/{entry['total']:<5}"
+              f"{str(entry.get('difficulty', '')):<10}{entry.get('date', '')} {entry.get('time', '')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge Math Hunter scoreboards from many devices")
+    parser.add_argument('paths', nargs='+', help="scoreboard.json files or .jsonl journals")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--dedupe', action='store_true', help="count identical entries once")
+    parser.add_argument('--output', help="write the global top-N as a scoreboard.json")
+    args = parser.parse_args()
+
+    merged = merge_scoreboards(args.paths, args.top, args.dedupe)
+    print_board(f"Top {args.top} overall", merged["all"])
+    for difficulty, entries in merged["by_difficulty"].items():
+        print_board(f"Top {args.top} {difficulty or '(no difficulty)'}", entries)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(merged["all"], f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
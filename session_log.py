@@ -0,0 +1,236 @@
+"""
+Math Hunter - Session Replay Log
+Append-only binary log of quiz sessions with a memory-mapped reader
+
+Every event is one fixed-size little-endian record (see RECORD), so the
+file can be scanned with struct.iter_unpack straight off an mmap without
+any parsing. Custom difficulty profiles are logged with codes from
+CUSTOM_CODE_BASE up, named in a small JSON list next to the log
+(<log>.names).
+
+Usage:
+    python session_log.py sessions.bin
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+SESSION_LOG_FILE = "sessions.bin"
+
+# Record kinds
+KIND_START = 0
+KIND_ANSWER = 1
+KIND_TIMEOUT = 2
+KIND_RESTART = 3
+
+DIFFICULTY_CODES = ("", "Easy", "Medium", "Hard", "Adaptive")
+CUSTOM_CODE_BASE = 64  # custom profile i is logged as CUSTOM_CODE_BASE + i (up to 255)
+OPERATOR_CODES = ("", "+", "-", "*", "//", "/", "%", "**", "÷")  # append only
+
+# kind, difficulty, op1, op2, num1, num2, num3, question_index, chosen,
+# correct, response_ms, session_id, timestamp_ms
+RECORD = struct.Struct('<BBBBiiiHbBIIq')
+
+_LogRecord = namedtuple('_LogRecord', [
+    'kind', 'difficulty', 'op1', 'op2', 'num1', 'num2', 'num3',
+    'question_index', 'chosen', 'correct', 'response_ms', 'session_id', 'timestamp_ms'
+])
+
+
+class LogRecord(_LogRecord):
+    """One decoded log record (codes are kept raw, see the properties)"""
+    __slots__ = ()
+
+    @property
+    def difficulty_name(self):
+        """Built-in difficulty name (custom profiles: SessionLogReader.difficulty_name)"""
+        return difficulty_name(self.difficulty)
+
+    @property
+    def expression(self):
+        """Question expression, e.g. '12 * 7' (empty for non-question records)"""
+        if not self.op1:
+            return ""
+        expression = f"{self.num1} {OPERATOR_CODES[self.op1]} {self.num2}"
+        if self.op2:
+            expression += f" {OPERATOR_CODES[self.op2]} {self.num3}"
+        return expression
+
+
+def names_path(path):
+    return path + '.names'
+
+
+def load_custom_names(path):
+    """Custom difficulty names of a log; name i has code CUSTOM_CODE_BASE + i"""
+    try:
+        with open(names_path(path), 'r') as f:
+            names = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [str(name) for name in names] if isinstance(names, list) else []
+
+
+def difficulty_name(code, custom_names=()):
+    """Difficulty name for a code ('' when unknown)"""
+    if code < len(DIFFICULTY_CODES):
+        return DIFFICULTY_CODES[code]
+    index = code - CUSTOM_CODE_BASE
+    return custom_names[index] if 0 <= index < len(custom_names) else ""
+
+
+def _encode_expression(expression):
+    """Split 'a op b [op c]' into (op1, op2, num1, num2, num3) codes"""
+    tokens = expression.split()
+    nums = [int(t) for t in tokens[::2]] + [0, 0]
+    ops = [OPERATOR_CODES.index(t) for t in tokens[1::2]] + [0]
+    return ops[0], ops[1], nums[0], nums[1], nums[2]
+
+
+class SessionLogWriter:
+    """Appends session events to a binary log file"""
+    def __init__(self, path=SESSION_LOG_FILE):
+        self.path = path
+        self.file = open(path, 'ab')
+        # Record count so far; a session's id is the index of its START record
+        self.next_index = self.file.tell() // RECORD.size
+        self.session_id = 0
+        self.difficulty = 0
+        self.custom_names = load_custom_names(path)
+
+    def difficulty_code(self, difficulty):
+        """Code for a difficulty, naming a new custom profile in the names file"""
+        if difficulty in DIFFICULTY_CODES:
+            return DIFFICULTY_CODES.index(difficulty)
+        if difficulty in self.custom_names:
+            return CUSTOM_CODE_BASE + self.custom_names.index(difficulty)
+        if CUSTOM_CODE_BASE + len(self.custom_names) > 255:
+            return 0
+        self.custom_names.append(difficulty)
+        tmp_path = names_path(self.path) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.custom_names, f)
+        os.replace(tmp_path, names_path(self.path))
+        return CUSTOM_CODE_BASE + len(self.custom_names) - 1
+
+    def _write(self, kind, question=None, question_index=0, chosen=-1, correct=False, response_ms=0):
+        if question is not None:
+            op1, op2, num1, num2, num3 = _encode_expression(question["expression"])
+        else:
+            op1 = op2 = num1 = num2 = num3 = 0
+        self.file.write(RECORD.pack(
+            kind, self.difficulty, op1, op2, num1, num2, num3,
+            question_index, chosen, 1 if correct else 0, response_ms,
+            self.session_id, int(time.time() * 1000)
+        ))
+        self.next_index += 1
+
+    def start(self, difficulty, restart=False):
+        """Begin a new session (a RESTART record is written first if restart)"""
+        if restart:
+            self._write(KIND_RESTART)
+        self.difficulty = self.difficulty_code(difficulty)
+        self.session_id = self.next_index
+        self._write(KIND_START)
+        self.file.flush()
+
+    def answer(self, question, question_index, chosen, correct, response_ms):
+        """Record an answered question"""
+        self._write(KIND_ANSWER, question, question_index, chosen, correct, response_ms)
+
+    def timeout(self, question, question_index, response_ms):
+        """Record a question that ran out of time"""
+        self._write(KIND_TIMEOUT, question, question_index, -1, False, response_ms)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class SessionLogReader:
+    """Memory-mapped, random-access view of a session log"""
+    def __init__(self, path=SESSION_LOG_FILE):
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // RECORD.size  # a torn trailing record is ignored
+        # mmap cannot map an empty file
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.custom_names = load_custom_names(path)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("record index out of range")
+        return LogRecord._make(RECORD.unpack_from(self.buffer, index * RECORD.size))
+
+    def __iter__(self):
+        return map(LogRecord._make, self.raw())
+
+    def difficulty_name(self, code):
+        """Difficulty name for a code, custom profiles included"""
+        return difficulty_name(code, self.custom_names)
+
+    def raw(self, start=0, stop=None):
+        """Iterate plain tuples over [start, stop) without building LogRecords"""
+        stop = self.count if stop is None else min(stop, self.count)
+        view = memoryview(self.buffer)[start * RECORD.size:stop * RECORD.size]
+        return RECORD.iter_unpack(view)
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def summarize(path=SESSION_LOG_FILE):
+    """Per-difficulty answer/accuracy/restart counts from a log"""
+    stats = {}
+    with SessionLogReader(path) as reader:
+        for kind, difficulty, *_, correct, response_ms, _session, _ts in reader.raw():
+            entry = stats.setdefault(reader.difficulty_name(difficulty), {
+                "sessions": 0, "answers": 0, "correct": 0, "timeouts": 0,
+                "restarts": 0, "response_ms": 0
+            })
+            if kind == KIND_START:
+                entry["sessions"] += 1
+            elif kind == KIND_ANSWER:
+                entry["answers"] += 1
+                entry["correct"] += correct
+                entry["response_ms"] += response_ms
+            elif kind == KIND_TIMEOUT:
+                entry["timeouts"] += 1
+            elif kind == KIND_RESTART:
+                entry["restarts"] += 1
+    return stats
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else SESSION_LOG_FILE
+    for difficulty, entry in summarize(path).items():
+        answers = entry["answers"]
+        accuracy = entry["correct"] / answers * 100 if answers else 0
+        avg_ms = entry["response_ms"] / answers if answers else 0
+        print(f"{difficulty or '-':<10} sessions {entry['sessions']:>7}  answers {answers:>9}  "
+              f"accuracy {accuracy:5.1f}%  avg {avg_ms:6.0f}ms  "
+              f"timeouts {entry['timeouts']:>6}  restarts {entry['restarts']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""
+Math Hunter - Multi-Session Engine
+Many independent quizzes in one process, driven by session id
+
+GameData holds one quiz; a SessionManager holds many. Questions live once
+in an immutable pool of distinct questions per difficulty (from
+GameData.generate_pool, capped at the difficulty's question space) and a
+session keeps only an array of pool indexes plus a few counters, so tens
+of thousands of live sessions fit in a few megabytes. The manager evicts
+the least recently used session beyond max_sessions.
+
+Every method is safe to call from several threads: a session is only
+changed under one of LOCK_STRIPES striped locks (picked by session id),
+and the session table under the manager's lock.
+
+Usage:
+    python sessions.py --sessions 50000 --threads 8 --answers 500000
+"""
+
+import argparse
+import itertools
+import random
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import OrderedDict
+
+from game_engine import GameData
+
+POOL_SIZE = 2000        # distinct questions per difficulty pool (fewer if the space is smaller)
+MAX_SESSIONS = 100000   # live sessions kept before the least recently used is evicted
+LOCK_STRIPES = 64
+
+
+class QuizSession:
+    """Compact per-session state: pool indexes, position and score"""
+    __slots__ = ('session_id', 'difficulty', 'order', 'index', 'score', 'restarts',
+                 'question_start', 'time_limit', 'restart_on_miss')
+
+    def __init__(self, session_id, difficulty, order, time_limit, restart_on_miss):
+        self.session_id = session_id
+        self.difficulty = difficulty
+        self.order = order  # array of indexes into the difficulty's pool
+        self.index = 0
+        self.score = 0
+        self.restarts = 0
+        self.question_start = time.monotonic()
+        self.time_limit = time_limit
+        self.restart_on_miss = restart_on_miss
+
+    @property
+    def total_questions(self):
+        return len(self.order)
+
+    def is_complete(self):
+        return self.index >= len(self.order)
+
+
+class SessionManager:
+    """Creates, advances and grades quiz sessions by id"""
+    def __init__(self, max_sessions=MAX_SESSIONS, pool_size=POOL_SIZE, profiles_file=None, seed=None):
+        self.max_sessions = max_sessions
+        self.pool_size = pool_size
+        self.generator = GameData(scoreboard_file=None, sounds=False, avoid_recent=False,
+                                  profiles_file=profiles_file, seed=seed)
+        self.profiles = self.generator.profiles
+        self.pools = {}  # difficulty -> tuple of question dicts
+        self.rng = random.Random(seed)
+
+        self.sessions = OrderedDict()  # session id -> QuizSession, least recently used first
+        self.lock = threading.Lock()   # guards sessions, pools and rng
+        self.stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.ids = itertools.count(1)
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def pool(self, difficulty):
+        """Shared pool of distinct questions for a difficulty (generated on first use)"""
+        pool = self.pools.get(difficulty)
+        if pool is None:
+            if difficulty not in self.profiles:
+                raise ValueError(f"unknown difficulty {difficulty!r}")
+            with self.lock:
+                pool = self.pools.get(difficulty)
+                if pool is None:
+                    pool = tuple(self.generator.generate_pool(self.pool_size, difficulty))
+                    self.pools[difficulty] = pool
+        return pool
+
+    def _draw(self, difficulty, num_questions, rng=None):
+        """Distinct pool indexes, so a session never repeats a question"""
+        pool = self.pool(difficulty)
+        num_questions = min(num_questions, len(pool))
+        if rng is None:
+            with self.lock:
+                picks = self.rng.sample(range(len(pool)), num_questions)
+        else:
+            picks = rng.sample(range(len(pool)), num_questions)
+        return array('H' if len(pool) <= 0xFFFF else 'I', picks)
+
+    def create(self, difficulty, num_questions=None, seed=None):
+        """Start a session and return its id (num_questions defaults to the profile's)"""
+        profile = self.profiles.get(difficulty)
+        if profile is None:
+            raise ValueError(f"unknown difficulty {difficulty!r}")
+        order = self._draw(difficulty, num_questions or profile.questions,
+                           random.Random(seed) if seed is not None else None)
+
+        with self.lock:
+            session_id = next(self.ids)
+            self.sessions[session_id] = QuizSession(
+                session_id, difficulty, order, profile.time_limit, profile.restart_on_miss)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.evicted += 1
+        return session_id
+
+    def _touch(self, session_id):
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                raise KeyError(f"unknown or expired session {session_id}")
+            self.sessions.move_to_end(session_id)
+        return session, self.stripes[session_id % LOCK_STRIPES]
+
+    def get(self, session_id):
+        """The session for an id (raises KeyError)"""
+        return self._touch(session_id)[0]
+
+    def current_question(self, session_id):
+        """(question index, question dict), or None when the quiz is complete"""
+        session, stripe = self._touch(session_id)
+        with stripe:
+            if session.is_complete():
+                return None
+            return session.index, self.pools[session.difficulty][session.order[session.index]]
+
+    def answer(self, session_id, selected_index, question_index=None):
+        """Grade the current question and advance.
+
+        Returns {"correct", "correct_index", "score", "index", "finished",
+        "restarted"}, or None when question_index is given and is no longer
+        current (a duplicate or late submission). An answer past the time
+        limit counts as wrong; in restart_on_miss modes a miss restarts the
+        session with a fresh draw, as GameData.restart_quiz does.
+        """
+        session, stripe = self._touch(session_id)
+        pool = self.pools[session.difficulty]
+        with stripe:
+            if session.is_complete():
+                return None
+            if question_index is not None and question_index != session.index:
+                return None
+
+            question = pool[session.order[session.index]]
+            correct = selected_index == question["correct_index"]
+            if session.time_limit is not None and \
+                    time.monotonic() - session.question_start > session.time_limit:
+                correct = False
+
+            restarted = False
+            if correct:
+                session.score += 1
+                session.index += 1
+            elif session.restart_on_miss:
+                restarted = True
+                session.restarts += 1
+                session.order = self._draw(session.difficulty, len(session.order))
+                session.index = 0
+                session.score = 0
+            else:
+                session.index += 1
+            session.question_start = time.monotonic()
+
+            return {
+                "correct": correct,
+                "correct_index": question["correct_index"],
+                "score": session.score,
+                "index": session.index,
+                "finished": session.is_complete(),
+                "restarted": restarted,
+            }
+
+    def time_up(self, session_id):
+        """The current question ran out of time (graded as a miss)"""
+        return self.answer(session_id, -1)
+
+    def end(self, session_id):
+        """Remove a session and return its final summary"""
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is None:
+            raise KeyError(f"unknown or expired session {session_id}")
+        return {
+            "difficulty": session.difficulty,
+            "score": session.score,
+            "total": session.total_questions,
+            "answered": session.index,
+            "restarts": session.restarts,
+        }
+
+    def expire(self, idle_seconds):
+        """Drop sessions with no answer for idle_seconds; returns how many"""
+        cutoff = time.monotonic() - idle_seconds
+        with self.lock:
+            stale = [sid for sid, session in self.sessions.items() if session.question_start < cutoff]
+            for session_id in stale:
+                del self.sessions[session_id]
+        return len(stale)
+
+
+# ============================================================================
+# LOAD TEST
+# ============================================================================
+
+def bench(num_sessions, threads, answers, difficulty, accuracy, seed=None):
+    manager = SessionManager(max_sessions=num_sessions + 1000, seed=seed)
+    manager.pool(difficulty)
+
+    start = time.perf_counter()
+    ids = [manager.create(difficulty) for _ in range(num_sessions)]
+    create_time = time.perf_counter() - start
+
+    # Memory per session from a traced sample (tracing slows creation down)
+    sample = min(1000, num_sessions)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    extra = [manager.create(difficulty) for _ in range(sample)]
+    session_bytes = (tracemalloc.get_traced_memory()[0] - before) / sample
+    tracemalloc.stop()
+    for session_id in extra:
+        manager.end(session_id)
+
+    per_thread = [answers // threads + (1 if i < answers % threads else 0) for i in range(threads)]
+    results = [0] * threads
+    replaced = [0] * threads
+
+    def worker(worker_id, count):
+        rng = random.Random(None if seed is None else seed + worker_id)
+        done = 0
+        while done < count:
+            slot = rng.randrange(len(ids))
+            session_id = ids[slot]
+            try:
+                current = manager.current_question(session_id)
+                if current is None:
+                    # Finished: replace it with a new session so answers never run out
+                    manager.end(session_id)
+                    ids[slot] = manager.create(difficulty)
+                    replaced[worker_id] += 1
+                    continue
+                index, question = current
+                selected = question["correct_index"] if rng.random() < accuracy else -1
+                if manager.answer(session_id, selected, index) is not None:
+                    done += 1
+            except KeyError:
+                continue
+        results[worker_id] = done
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i, count)) for i, count in enumerate(per_thread)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"Sessions: {num_sessions}  threads: {threads}  difficulty: {difficulty}")
+    print(f"Create: {create_time / num_sessions * 1e6:.1f}us per session  "
+          f"~{session_bytes:.0f} bytes per session")
+    print(f"Answers: {sum(results)} in {elapsed:.2f}s  ({sum(results) / elapsed:.0f}/s)")
+    print(f"Live sessions: {len(manager)}  finished and replaced: {sum(replaced)}  "
+          f"evicted: {manager.evicted}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Math Hunter multi-session engine load test")
+    parser.add_argument('--sessions', type=int, default=50000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--answers', type=int, default=500000)
+    parser.add_argument('--difficulty', default='Medium')
+    parser.add_argument('--accuracy', type=float, default=0.8)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    bench(args.sessions, args.threads, args.answers, args.difficulty, args.accuracy, args.seed)
+
+
+if __name__ == '__main__':
+    main()